@@ -0,0 +1,291 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from profiling import cache_probe, mark_miss
+
+# --- Chart Aggregation Stage ---
+# The pages used to hand the row-level frame to Plotly, which then emitted one
+# bar segment per respondent. These helpers reduce the rows with a vectorized
+# groupby first, so a chart's payload only grows with the number of categories.
+
+
+def _label(values):
+    """Turns a grouping column into discrete labels so Plotly colours it by category."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values
+    return values.astype(str)
+
+
+def count_by(df, x, color=None):
+    """Returns one row per (x, color) combination with its respondent count."""
+    keys = [x] if color is None else [x, color]
+    counts = (
+        df.groupby(keys, observed=True, sort=True)
+        .size()
+        .reset_index(name='count')
+    )
+    if color is not None:
+        counts[color] = _label(counts[color])
+    return counts
+
+
+def mean_by(df, x, y, color=None):
+    """Returns one row per (x, color) combination with the mean of y and its count."""
+    keys = [x] if color is None else [x, color]
+    means = (
+        df.groupby(keys, observed=True, sort=True)[y]
+        .agg(['mean', 'size'])
+        .reset_index()
+        .rename(columns={'mean': y, 'size': 'count'})
+    )
+    if color is not None:
+        means[color] = _label(means[color])
+    return means
+
+
+def box_stats(df, x, y, color=None, max_outliers=50, seed=0):
+    """Returns Tukey box-plot statistics of y for every (x, color) group.
+
+    Quartiles come from one grouped quantile pass; the whiskers stop at the most
+    extreme values within 1.5 IQR of the box, and at most max_outliers of the
+    points beyond them are kept per group, so the result has one row per group
+    no matter how many respondents there are.
+    """
+    keys = [x] if color is None else [x, color]
+    rows = df[keys + [y]].dropna(subset=[y])
+    grouped = rows.groupby(keys, observed=True, sort=True)
+    stats = grouped[y].quantile([0.25, 0.5, 0.75]).unstack()
+    stats.columns = ['q1', 'median', 'q3']
+    stats['count'] = grouped.size()
+
+    # Broadcast each group's fence limits back to its rows to find the whiskers.
+    group_id = grouped.ngroup().to_numpy()
+    iqr = (stats['q3'] - stats['q1']).to_numpy()
+    low_limit = (stats['q1'].to_numpy() - 1.5 * iqr)[group_id]
+    high_limit = (stats['q3'].to_numpy() + 1.5 * iqr)[group_id]
+    values = rows[y].to_numpy()
+    inside = (values >= low_limit) & (values <= high_limit)
+    inside_values = pd.Series(values, index=rows.index).where(inside)
+    whiskers = inside_values.groupby(group_id).agg(['min', 'max'])
+    stats['lowerfence'] = whiskers['min'].to_numpy()
+    stats['upperfence'] = whiskers['max'].to_numpy()
+
+    # Keep a shuffled, capped sample of the outliers of each group.
+    outliers = pd.Series(values[~inside], index=group_id[~inside])
+    outliers = outliers.sample(frac=1, random_state=seed)
+    outliers = outliers.groupby(level=0).head(max_outliers)
+    sampled = outliers.groupby(level=0).agg(list)
+    stats['outliers'] = [sampled.get(i, []) for i in range(len(stats))]
+    return stats.reset_index()
+
+
+# --- Aggregate Count Cube ---
+# Numeric columns with at most this many distinct values (the midpoints and the
+# failure flag) are treated as extra dimensions of the cube.
+MAX_NUMERIC_LEVELS = 64
+
+
+class CountCube:
+    """Sparse count cube over the categorical columns of the survey table.
+
+    Built in one pass: every row's category codes are packed into a single
+    mixed-radix integer key and counted. Only the occupied cells are kept, so
+    crosstabs, marginal counts and percentages are answered from at most one
+    entry per distinct answer combination instead of rescanning the rows.
+    """
+
+    def __init__(self, dims, levels, cells, counts):
+        self.dims = list(dims)
+        self.levels = dict(levels)
+        self.cells = cells
+        self.counts = counts
+        self.total = int(counts.sum())
+        self._marginals = {}
+
+    @classmethod
+    def from_frame(cls, df):
+        dims, levels, codes = [], {}, []
+        for col in df.columns:
+            values = df[col]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                col_codes = values.cat.codes.to_numpy()
+                col_levels = values.cat.categories
+            elif pd.api.types.is_numeric_dtype(values) and values.nunique() <= MAX_NUMERIC_LEVELS:
+                col_codes, col_levels = pd.factorize(values, sort=True)
+            else:
+                continue
+            dims.append(col)
+            levels[col] = pd.Index(col_levels)
+            # Code 0 is reserved for missing answers, so shift everything by one.
+            codes.append(col_codes.astype(np.int64) + 1)
+
+        radices = [len(levels[col]) + 1 for col in dims]
+        if not dims:
+            return cls(dims, levels, np.zeros((1, 0), dtype=np.int16), np.array([len(df)]))
+        if float(np.prod(radices, dtype=np.float64)) < 2 ** 62:
+            keys = np.zeros(len(df), dtype=np.int64)
+            for col_codes, radix in zip(codes, radices):
+                keys = keys * radix + col_codes
+            unique_keys, counts = np.unique(keys, return_counts=True)
+            cells = np.empty((len(unique_keys), len(dims)), dtype=np.int16)
+            for i in range(len(dims) - 1, -1, -1):
+                unique_keys, cells[:, i] = np.divmod(unique_keys, radices[i])
+        else:
+            cells, counts = np.unique(np.column_stack(codes), axis=0, return_counts=True)
+            cells = cells.astype(np.int16)
+        return cls(dims, levels, cells, counts)
+
+    @classmethod
+    def merge(cls, cubes):
+        """Combines the cubes of disjoint sets of rows (e.g. survey waves) into one.
+
+        Only the cells are combined, so merging a new wave into the cube of all
+        earlier ones never touches their rows. Levels missing from one of the cubes
+        (e.g. a numeric value first seen in the new wave) are added.
+        """
+        cubes = list(cubes)
+        dims = cubes[0].dims
+        for cube in cubes[1:]:
+            if cube.dims != dims:
+                raise ValueError(f"Cannot merge cubes over different columns: {cube.dims} vs {dims}")
+
+        levels, remapped = {}, [cube.cells.astype(np.int64) for cube in cubes]
+        for i, col in enumerate(dims):
+            col_levels = [cube.levels[col] for cube in cubes]
+            if all(lv.equals(col_levels[0]) for lv in col_levels[1:]):
+                levels[col] = col_levels[0]
+                continue
+            merged = col_levels[0]
+            for lv in col_levels[1:]:
+                merged = merged.append(lv[~lv.isin(merged)])
+            if pd.api.types.is_numeric_dtype(merged):
+                merged = merged.sort_values()
+            levels[col] = merged
+            for cells, lv in zip(remapped, col_levels):
+                # Code 0 (missing) stays 0; level k moves to its position in merged.
+                mapping = np.concatenate([[0], merged.get_indexer(lv) + 1])
+                cells[:, i] = mapping[cells[:, i]]
+
+        cells, inverse = np.unique(np.concatenate(remapped), axis=0, return_inverse=True)
+        counts = np.bincount(inverse.ravel(), weights=np.concatenate([c.counts for c in cubes]),
+                             minlength=len(cells))
+        return cls(dims, levels, cells.astype(np.int16), counts.astype(np.int64))
+
+    def marginal(self, *cols):
+        """Dense count array over the given columns (missing answers dropped)."""
+        if cols not in self._marginals:
+            missing = [col for col in cols if col not in self.levels]
+            if missing:
+                raise KeyError(missing[0])
+            idx = [self.dims.index(col) for col in cols]
+            shape = [len(self.levels[col]) + 1 for col in cols]
+            flat = np.ravel_multi_index(tuple(self.cells[:, i] for i in idx), shape)
+            dense = np.bincount(flat, weights=self.counts, minlength=int(np.prod(shape)))
+            dense = dense.reshape(shape)[(slice(1, None),) * len(cols)]
+            self._marginals[cols] = dense.astype(np.int64)
+        return self._marginals[cols]
+
+    def value_counts(self, col):
+        """Counts per level of col, in category order (like value_counts(sort=False))."""
+        return pd.Series(self.marginal(col), index=self.levels[col], name='count')
+
+    def crosstab(self, index, columns):
+        """Same table as pd.crosstab(df[index], df[columns]), without the empty levels."""
+        table = pd.DataFrame(self.marginal(index, columns),
+                             index=self.levels[index].rename(index),
+                             columns=self.levels[columns].rename(columns))
+        return table.loc[table.sum(axis=1) > 0, table.sum(axis=0) > 0]
+
+    def count_by(self, x, color=None):
+        """Same result as aggregates.count_by(df, x, color)."""
+        if color is None:
+            counts = self.value_counts(x)
+            counts = counts[counts > 0].rename_axis(x).reset_index()
+            return counts
+        table = self.crosstab(x, color).stack()
+        counts = table[table > 0].rename('count').reset_index()
+        counts[color] = _label(counts[color])
+        return counts
+
+    def share(self, col, values):
+        """Percentage of respondents whose answer for col is one of values."""
+        counts = self.value_counts(col)
+        return counts[counts.index.isin(values)].sum() / max(self.total, 1) * 100
+
+    def histogram(self, col, nbins):
+        """Same counts and edges as np.histogram(df[col].dropna(), bins=nbins)."""
+        counts = self.value_counts(col)
+        counts = counts[counts > 0]
+        values = counts.index.to_numpy(dtype=float)
+        hist, edges = np.histogram(values, bins=nbins, range=(values.min(), values.max()),
+                                   weights=counts.to_numpy())
+        return hist.astype(np.int64), edges
+
+    def box_summary(self, col):
+        """Tukey box statistics of a numeric dimension, like box_stats() without groups.
+
+        Quartiles interpolate linearly between order statistics (as pandas does);
+        the outliers are the distinct values beyond the whiskers.
+        """
+        counts = self.value_counts(col)
+        counts = counts[counts > 0]
+        values = counts.index.to_numpy(dtype=float)
+        cumulative = counts.cumsum().to_numpy()
+        n = int(cumulative[-1])
+
+        def order_statistic(k):
+            return values[np.searchsorted(cumulative, k, side='right')]
+
+        def quantile(q):
+            position = (n - 1) * q
+            lower = int(np.floor(position))
+            low, high = order_statistic(lower), order_statistic(min(lower + 1, n - 1))
+            return low + (position - lower) * (high - low)
+
+        q1, median, q3 = quantile(0.25), quantile(0.5), quantile(0.75)
+        iqr = q3 - q1
+        inside = (values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)
+        return {
+            'q1': q1, 'median': median, 'q3': q3, 'count': n,
+            'lowerfence': values[inside].min(),
+            'upperfence': values[inside].max(),
+            'outliers': values[~inside].tolist(),
+        }
+
+    def median(self, col):
+        """Median of a numeric dimension, computed from its level counts."""
+        counts = self.value_counts(col)
+        cumulative = counts.cumsum().to_numpy()
+        n = cumulative[-1]
+        lower = counts.index[np.searchsorted(cumulative, (n - 1) // 2 + 1)]
+        upper = counts.index[np.searchsorted(cumulative, n // 2 + 1)]
+        return (lower + upper) / 2
+
+
+# Cubes already built while the data was loaded (store.load_store merges the
+# cubes of its waves), handed to the cache below instead of rescanning the rows.
+_prebuilt_cubes = {}
+
+
+def register_cube(version, cube):
+    """Makes get_cube() use cube for frames of this data version."""
+    _prebuilt_cubes[version] = cube
+
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def _cube_for_version(version, _df):
+    mark_miss()
+    prebuilt = _prebuilt_cubes.pop(version, None)
+    if prebuilt is not None:
+        return prebuilt
+    return CountCube.from_frame(_df)
+
+
+def get_cube(df):
+    """Returns the count cube for a frame, shared across sessions per data version."""
+    version = df.attrs.get('data_version')
+    if version is None:
+        return CountCube.from_frame(df)
+    with cache_probe('count_cube'):
+        return _cube_for_version(version, df)
@@ -0,0 +1,206 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from aggregates import get_cube
+from profiling import cache_probe, mark_miss
+from schema import DERIVED_COLUMNS
+
+# --- Pairwise Association Engine ---
+# Every pair of survey columns gets one association measure, chosen by the kind of
+# the two columns:
+#   categorical x categorical: Cramér's V, with the chi-square test p-value
+#   categorical x numeric:     correlation ratio (eta), with the one-way ANOVA p-value
+#   numeric x numeric:         Spearman's rho, with the t-test p-value
+# All of them only need the pair's contingency table, which the count cube gives
+# without another pass over the rows. The tables of all pairs of one kind are
+# stacked into one zero-padded array and the statistics are computed for all of
+# them at once.
+
+
+# Numeric codings of another column; pairing them with it only restates the coding.
+CODED_FROM = {col: source for col, (source, _) in DERIVED_COLUMNS.items()}
+METHOD_LABELS = {
+    'cramers_v': "Cramér's V",
+    'correlation_ratio': 'Correlation ratio',
+    'spearman': "Spearman's rho",
+}
+ASSOCIATION_COLUMNS = ['x', 'y', 'method', 'value', 'strength', 'test_statistic', 'p_value', 'n']
+
+
+def _is_numeric(cube, col):
+    return pd.api.types.is_numeric_dtype(cube.levels[col])
+
+
+def _stack(cube, pairs):
+    """Contingency tables of the pairs, zero-padded to one (pairs, rows, cols) array."""
+    tables = [cube.marginal(a, b) for a, b in pairs]
+    shape = (len(tables), max(t.shape[0] for t in tables), max(t.shape[1] for t in tables))
+    stacked = np.zeros(shape)
+    for i, table in enumerate(tables):
+        stacked[i, :table.shape[0], :table.shape[1]] = table
+    return stacked
+
+
+def _level_values(cube, pairs, width):
+    """Numeric level values of each pair's second column, padded to width."""
+    values = np.zeros((len(pairs), width))
+    for i, (_, col) in enumerate(pairs):
+        levels = cube.levels[col].to_numpy(dtype=float)
+        values[i, :len(levels)] = levels
+    return values
+
+
+def cramers_v(tables):
+    """Cramér's V, chi-square statistic and p-value per table."""
+    from scipy import stats
+
+    n = tables.sum(axis=(1, 2))
+    rows, cols = tables.sum(axis=2), tables.sum(axis=1)
+    expected = rows[:, :, None] * cols[:, None, :] / np.maximum(n, 1)[:, None, None]
+    # Padding and empty levels have zero expected counts and are left out.
+    terms = np.divide((tables - expected) ** 2, expected,
+                      out=np.zeros_like(tables), where=expected > 0)
+    chi2 = terms.sum(axis=(1, 2))
+    n_rows, n_cols = (rows > 0).sum(axis=1), (cols > 0).sum(axis=1)
+    k = np.minimum(n_rows, n_cols)
+    dof = (n_rows - 1) * (n_cols - 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        v = np.where(k > 1, np.sqrt(chi2 / n / (k - 1)), np.nan)
+        p = np.where(dof > 0, stats.chi2.sf(chi2, np.maximum(dof, 1)), np.nan)
+    return np.clip(v, 0, 1), chi2, p
+
+
+def correlation_ratio(tables, values):
+    """Correlation ratio (eta) and ANOVA p-value of a numeric column across categories.
+
+    tables[i] has the categories on its rows and the numeric levels on its columns,
+    whose values are values[i].
+    """
+    from scipy import stats
+
+    n = tables.sum(axis=(1, 2))
+    rows, cols = tables.sum(axis=2), tables.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        grand = (cols * values).sum(axis=1) / n
+        means = np.where(rows > 0, (tables * values[:, None, :]).sum(axis=2) / rows, 0)
+        between = (rows * (means - grand[:, None]) ** 2).sum(axis=1)
+        total = (cols * (values - grand[:, None]) ** 2).sum(axis=1)
+        eta = np.sqrt(between / total)
+        groups = (rows > 0).sum(axis=1)
+        f = (between / (groups - 1)) / ((total - between) / (n - groups))
+        p = np.where((groups > 1) & (n > groups), stats.f.sf(f, groups - 1, n - groups), np.nan)
+    return np.clip(eta, 0, 1), f, p
+
+
+def _mid_ranks(counts):
+    # Average rank of each level's respondents (ties share the mean rank).
+    return np.cumsum(counts, axis=1) - (counts - 1) / 2
+
+
+def spearman(tables):
+    """Spearman's rho and its two-sided p-value per table of two numeric columns."""
+    from scipy import stats
+
+    n = tables.sum(axis=(1, 2))
+    rows, cols = tables.sum(axis=2), tables.sum(axis=1)
+    row_ranks, col_ranks = _mid_ranks(rows), _mid_ranks(cols)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        row_dev = row_ranks - ((rows * row_ranks).sum(axis=1) / n)[:, None]
+        col_dev = col_ranks - ((cols * col_ranks).sum(axis=1) / n)[:, None]
+        cov = (tables * row_dev[:, :, None] * col_dev[:, None, :]).sum(axis=(1, 2))
+        rho = cov / np.sqrt((rows * row_dev ** 2).sum(axis=1) * (cols * col_dev ** 2).sum(axis=1))
+        rho = np.clip(rho, -1, 1)
+        t = rho * np.sqrt((n - 2) / (1 - rho ** 2))
+        p = np.where(n > 2, 2 * stats.t.sf(np.abs(t), np.maximum(n - 2, 1)), np.nan)
+    return rho, t, p
+
+
+def compute_associations(cube):
+    """Returns one row per column pair (see ASSOCIATION_COLUMNS).
+
+    'value' is V, eta or rho (the only signed one); 'strength' is its absolute value,
+    so all three measures share the 0-1 scale of the heatmap.
+    """
+    cols = list(cube.dims)
+    by_kind = {'cramers_v': [], 'correlation_ratio': [], 'spearman': []}
+    for i, a in enumerate(cols):
+        for b in cols[i + 1:]:
+            numeric_a, numeric_b = _is_numeric(cube, a), _is_numeric(cube, b)
+            if numeric_a and numeric_b:
+                by_kind['spearman'].append((a, b))
+            elif numeric_a or numeric_b:
+                # Categories on the rows, numeric levels on the columns.
+                by_kind['correlation_ratio'].append((b, a) if numeric_a else (a, b))
+            else:
+                by_kind['cramers_v'].append((a, b))
+
+    frames = []
+    for method, pairs in by_kind.items():
+        if not pairs:
+            continue
+        tables = _stack(cube, pairs)
+        if method == 'cramers_v':
+            value, test_statistic, p = cramers_v(tables)
+        elif method == 'correlation_ratio':
+            value, test_statistic, p = correlation_ratio(
+                tables, _level_values(cube, pairs, tables.shape[2]))
+        else:
+            value, test_statistic, p = spearman(tables)
+        frames.append(pd.DataFrame({
+            'x': [a for a, _ in pairs],
+            'y': [b for _, b in pairs],
+            'method': method,
+            'value': value,
+            'strength': np.abs(value),
+            'test_statistic': test_statistic,
+            'p_value': p,
+            'n': tables.sum(axis=(1, 2)).astype(np.int64),
+        }))
+    if not frames:
+        return pd.DataFrame(columns=ASSOCIATION_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+
+def association_matrix(pairs, columns, value='strength'):
+    """Symmetric column x column matrix of one field of compute_associations()."""
+    position = {col: i for i, col in enumerate(columns)}
+    values = pairs[value].to_numpy()
+    matrix = np.full((len(columns), len(columns)), np.nan,
+                     dtype=float if values.dtype.kind in 'fiu' else object)
+    if value in ('strength', 'value'):
+        np.fill_diagonal(matrix, 1.0)
+    rows = pairs['x'].map(position).to_numpy()
+    cols = pairs['y'].map(position).to_numpy()
+    matrix[rows, cols] = matrix[cols, rows] = values
+    return pd.DataFrame(matrix, index=columns, columns=columns)
+
+
+def strongest_associations(pairs, top=5, alpha=0.05):
+    """The top significant pairs by strength, counting a column and its coding once."""
+    source_x = pairs['x'].map(lambda col: CODED_FROM.get(col, col))
+    source_y = pairs['y'].map(lambda col: CODED_FROM.get(col, col))
+    pair_key = pd.Series([tuple(sorted(key)) for key in zip(source_x, source_y)],
+                         index=pairs.index, dtype=object)
+    significant = pairs[(source_x != source_y) & (pairs['p_value'] < alpha)]
+    # Taken on significant's own index: assigning the full-length Series to an
+    # empty frame would bring back every pair as an all-NaN row.
+    significant = significant.assign(pair_key=pair_key.loc[significant.index])
+    strongest = significant.sort_values('strength', ascending=False).drop_duplicates('pair_key')
+    return strongest.drop(columns='pair_key').head(top)
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _associations_for_version(version, _cube):
+    mark_miss()
+    return compute_associations(_cube)
+
+
+def get_associations(df):
+    """Returns the pairwise associations of a (possibly filtered) frame."""
+    version = df.attrs.get('data_version')
+    cube = get_cube(df)
+    if version is None:
+        return compute_associations(cube)
+    with cache_probe('associations'):
+        return _associations_for_version(version, cube)
@@ -0,0 +1,198 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+BUNDLED_CSV = os.path.join(APP_DIR, 'df.csv')
+BENCH_DATA_DIR = os.path.join(APP_DIR, '.bench_data')
+
+PAGES = [
+    'home.py',
+    'main.py',
+    'Studying_Social_and_Mental_Health_Risk_Factors_Among_Addicts.py',
+    'Identifying Correlations between Risk and Life Outcome.py',
+]
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000, 10_000_000]
+PAGE_TIMEOUT = 900
+
+
+# --- Synthetic Survey Tables ---
+def synthetic_table(n_rows, seed=0):
+    """Returns n_rows survey rows resampled (with replacement) from the bundled df.csv.
+
+    Resampling whole rows keeps the schema, every column's category distribution
+    and the joint structure between columns (e.g. age vs. age_midpoint).
+    """
+    from data import apply_schema
+    import pandas as pd
+
+    source = apply_schema(pd.read_csv(BUNDLED_CSV))
+    rows = np.random.default_rng(seed).integers(0, len(source), n_rows)
+    return source.take(rows).reset_index(drop=True)
+
+
+def synthetic_csv(n_rows, seed=0):
+    """Writes (once) a synthetic CSV of n_rows and primes its columnar cache."""
+    from data import load_columnar
+
+    os.makedirs(BENCH_DATA_DIR, exist_ok=True)
+    csv_path = os.path.join(BENCH_DATA_DIR, f'survey_{n_rows}_{seed}.csv')
+    cache_path = os.path.splitext(csv_path)[0] + '.arrow'
+    if not os.path.exists(csv_path):
+        tmp_path = f'{csv_path}.tmp'
+        synthetic_table(n_rows, seed).to_csv(tmp_path, index=False)
+        os.replace(tmp_path, csv_path)
+    # Parse once here so the page runs measure the normal (cached) load path.
+    load_columnar(csv_path, cache_path)
+    return csv_path
+
+
+# --- Page Runs ---
+def _proc_status_kib(field):
+    # VmRSS is the current resident set, VmHWM its peak. Unlike ru_maxrss, VmHWM
+    # is not inherited from the parent process that spawned this worker.
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(field + ':'):
+                return int(line.split()[1])
+    return 0
+
+
+def _chart_payloads(app):
+    charts = []
+    for element in app.get('plotly_chart'):
+        spec = element.proto.spec
+        title = json.loads(spec).get('layout', {}).get('title', {}).get('text', '')
+        charts.append({'title': title, 'bytes': len(spec.encode())})
+    return charts
+
+
+def _chart_build_times(page, csv_path):
+    # Times each chart's builder on its own, bypassing the figure cache, with the
+    # (already cached) table the page used.
+    from charts import CHARTS, PAGE_CHARTS
+    from data import load_columnar
+
+    df = load_columnar(csv_path, os.path.splitext(csv_path)[0] + '.arrow')
+    timings = []
+    for name in PAGE_CHARTS.get(page, []):
+        start = time.perf_counter()
+        figure = CHARTS[name](df)
+        timings.append({'name': name, 'title': figure.layout.title.text,
+                        'build_seconds': round(time.perf_counter() - start, 4)})
+    return timings
+
+
+def run_page(page, csv_path):
+    """Runs one page headlessly (cold, then warm) and returns its measurements."""
+    os.environ['SCV_DATA_PATH'] = csv_path
+    sys.path.insert(0, APP_DIR)
+    from streamlit.testing.v1 import AppTest
+
+    rss_start = _proc_status_kib('VmRSS')
+    app = AppTest.from_file(os.path.join(APP_DIR, page), default_timeout=PAGE_TIMEOUT)
+    start = time.perf_counter()
+    app.run()
+    cold = time.perf_counter() - start
+    start = time.perf_counter()
+    app.run()
+    warm = time.perf_counter() - start
+
+    charts = _chart_payloads(app)
+    timings = {timing['title']: timing for timing in _chart_build_times(page, csv_path)}
+    for chart in charts:
+        timing = timings.get(chart['title'], {})
+        chart.update(name=timing.get('name'), build_seconds=timing.get('build_seconds'))
+    return {
+        'page': page,
+        'cold_seconds': round(cold, 4),
+        'warm_seconds': round(warm, 4),
+        'rss_start_kib': rss_start,
+        'peak_rss_kib': _proc_status_kib('VmHWM'),
+        'chart_bytes': sum(chart['bytes'] for chart in charts),
+        'charts': charts,
+        'exceptions': [str(e.value) for e in app.exception],
+    }
+
+
+def _run_in_subprocess(page, csv_path):
+    # A fresh interpreter per page keeps peak RSS and caches independent.
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--worker', page, csv_path],
+        capture_output=True, text=True, cwd=APP_DIR,
+    )
+    if result.returncode != 0:
+        return {'page': page, 'error': result.stderr.strip().splitlines()[-1:]}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+# --- Comparison ---
+def compare(previous, current, threshold=0.10):
+    """Prints per page/size changes in wall time, peak RSS and chart bytes."""
+    before = {(r['rows'], r['page']): r for r in previous['results'] if 'error' not in r}
+    for result in current['results']:
+        old = before.get((result['rows'], result['page']))
+        if old is None or 'error' in result:
+            continue
+        changes = []
+        for metric in ('cold_seconds', 'warm_seconds', 'peak_rss_kib', 'chart_bytes'):
+            if old[metric]:
+                ratio = result[metric] / old[metric] - 1
+                flag = ' !' if ratio > threshold else ''
+                changes.append(f"{metric} {ratio:+.0%}{flag}")
+        print(f"{result['rows']:>10} {result['page'][:40]:<40} " + ', '.join(changes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless benchmark of every dashboard page.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--pages', nargs='+', default=PAGES)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--compare', help="earlier results file to compare against")
+    parser.add_argument('--worker', nargs=2, metavar=('PAGE', 'CSV'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_page(*args.worker)))
+        return
+
+    results = []
+    for n_rows in args.sizes:
+        start = time.perf_counter()
+        csv_path = synthetic_csv(n_rows, args.seed)
+        print(f"{n_rows} rows: data ready in {time.perf_counter() - start:.1f}s", flush=True)
+        for page in args.pages:
+            result = _run_in_subprocess(page, csv_path)
+            result['rows'] = n_rows
+            results.append(result)
+            if 'error' in result:
+                print(f"  {page}: FAILED {result['error']}", flush=True)
+            else:
+                print(f"  {page}: cold {result['cold_seconds']:.2f}s, warm {result['warm_seconds']:.2f}s, "
+                      f"peak RSS {result['peak_rss_kib'] / 1024:.0f} MiB, "
+                      f"charts {result['chart_bytes'] / 1024:.1f} KiB", flush=True)
+
+    report = {
+        'created': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': args.seed,
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+
+
+if __name__ == '__main__':
+    main()
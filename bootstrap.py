@@ -0,0 +1,240 @@
+import os
+import threading
+from collections import OrderedDict
+
+import streamlit as st
+
+# sidebar.py imports this module for the on/off switch, so numpy is imported
+# inside the functions that resample (like filters.py).
+
+# --- Bootstrap Confidence Intervals ---
+# Resampling the respondents with replacement is the same as drawing new counts
+# for the count cube's cells from a multinomial with the observed cell shares.
+# Each replicate is therefore one row of a (replicates x cells) count matrix, not
+# an index over every row, and every headline metric is a matrix product of that
+# matrix with an indicator over the cells.
+BOOTSTRAP_KEY = 'bootstrap_intervals'
+BOOTSTRAP_REPLICATES = 2000
+CONFIDENCE = 0.95
+CHUNK_REPLICATES = 250
+# Replicates are spread over a process pool once a draw covers this many cells
+# (multinomial draws cost grows with the number of distinct answer combinations).
+PARALLEL_MIN_CELLS = 20_000
+INTERVAL_CACHE_SIZE = 64
+
+# Metric keys of summary.compute_summary() with their label and unit.
+METRIC_LABELS = {
+    'median_age': ('Median age', ' years'),
+    'poor_fair_mh_pct': ('Poor/Fair mental health', '%'),
+    'unmarried_pct': ('Unmarried', '%'),
+    'peak_age_count': ('Peak age band count', ''),
+    'unmarried_top_problem_count': ('Unmarried with top problem', ''),
+    'poor_mh_top_education_count': ('Poor MH in top education group', ''),
+    'single_drug_family_history_count': ('Single drug, top family history', ''),
+    'largest_education_mh_count': ('Largest education/MH group', ''),
+}
+
+
+def interval_toggle():
+    """Draws the sidebar switch for the bootstrap interval mode."""
+    st.sidebar.toggle("Show bootstrap confidence intervals", key=BOOTSTRAP_KEY)
+
+
+def intervals_enabled():
+    return bool(st.session_state.get(BOOTSTRAP_KEY))
+
+
+# --- Resampling Design ---
+def metric_design(cube, summary):
+    """Describes each headline metric as counts over the cube cells.
+
+    Counts and shares are indicator columns over the cells (the groups are fixed at
+    the ones found in the data, e.g. the education level with most 'Poor' answers);
+    the median is a one-hot matrix of the age_midpoint levels.
+    """
+    import numpy as np
+
+    cells = cube.cells
+
+    def indicator(answers):
+        # Cells whose answers match all of {column: label}.
+        match = np.ones(len(cells), dtype=bool)
+        for col, label in answers.items():
+            match &= cells[:, cube.dims.index(col)] == cube.levels[col].get_loc(label) + 1
+        return match
+
+    def any_of(col, labels):
+        match = np.zeros(len(cells), dtype=bool)
+        for label in labels:
+            if label in cube.levels[col]:
+                match |= indicator({col: label})
+        return match
+
+    education, mental_health = summary['largest_education_mh_cell'] or (None, None)
+    groups = {
+        'poor_fair_mh_pct': ('share', lambda: any_of('mental_health_status', ['Poor', 'Fair'])),
+        'unmarried_pct': ('share', lambda: any_of('marital_status', ['Unmarried'])),
+        'peak_age_count': ('count', lambda: indicator({'age': summary['peak_age_band']})),
+        'unmarried_top_problem_count': ('count', lambda: indicator({
+            'marital_status': 'Unmarried',
+            'mental/emotional_problem': summary['unmarried_top_problem']})),
+        'poor_mh_top_education_count': ('count', lambda: indicator({
+            'mental_health_status': 'Poor',
+            'education_level': summary['poor_mh_top_education']})),
+        'single_drug_family_history_count': ('count', lambda: indicator({
+            'addicted_with': 'Single drug',
+            'family_history_of_drug_use': summary['single_drug_family_history']})),
+        'largest_education_mh_count': ('count', lambda: indicator({
+            'education_level': education, 'mental_health_status': mental_health})),
+    }
+    names, kinds, columns = [], [], []
+    for name, (kind, build) in groups.items():
+        try:
+            column = build()
+        except (KeyError, TypeError, ValueError):
+            continue  # column missing or no group left by the filters
+        names.append(name)
+        kinds.append(kind)
+        columns.append(column)
+
+    design = {
+        'n': cube.total,
+        'weights': cube.counts / max(cube.total, 1),
+        'names': names,
+        'kinds': kinds,
+        'indicators': np.column_stack(columns).astype(np.float64) if columns else None,
+        'median': None,
+    }
+    if 'age_midpoint' in cube.levels:
+        codes = cells[:, cube.dims.index('age_midpoint')]
+        levels = cube.levels['age_midpoint'].to_numpy(dtype=float)
+        onehot = (codes[:, None] == np.arange(1, len(levels) + 1)).astype(np.float64)
+        design['median'] = (onehot, levels)
+    return design
+
+
+def _replicate_chunk(design, n_replicates, seed):
+    """Metric values of n_replicates bootstrap samples, one row per replicate."""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    counts = rng.multinomial(design['n'], design['weights'], size=n_replicates).astype(np.float64)
+    values = {}
+    if design['indicators'] is not None:
+        totals = counts @ design['indicators']
+        for i, (name, kind) in enumerate(zip(design['names'], design['kinds'])):
+            values[name] = totals[:, i] / design['n'] * 100 if kind == 'share' else totals[:, i]
+    if design['median'] is not None:
+        onehot, levels = design['median']
+        cumulative = np.cumsum(counts @ onehot, axis=1)
+        n = design['n']
+        # Same rule as CountCube.median: mean of the two middle values.
+        lower = levels[(cumulative >= (n - 1) // 2 + 1).argmax(axis=1)]
+        upper = levels[(cumulative >= n // 2 + 1).argmax(axis=1)]
+        values['median_age'] = (lower + upper) / 2
+    return values
+
+
+def bootstrap_intervals(design, n_replicates=BOOTSTRAP_REPLICATES, confidence=CONFIDENCE,
+                        seed=0, progress=None, max_workers=None):
+    """Percentile intervals {metric: (low, high)} from n_replicates resamples.
+
+    The replicates are drawn in chunks with independent seeds, so the result does
+    not depend on whether the chunks ran in one process or in a pool. progress, if
+    given, is called with the finished fraction after each chunk.
+    """
+    import numpy as np
+
+    if design['n'] == 0:
+        return {}
+    sizes = [min(CHUNK_REPLICATES, n_replicates - start)
+             for start in range(0, n_replicates, CHUNK_REPLICATES)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    if max_workers is None:
+        max_workers = min(os.cpu_count() or 1, len(sizes))
+        if len(design['weights']) < PARALLEL_MIN_CELLS:
+            max_workers = 1
+
+    chunks = []
+    if max_workers <= 1:
+        for size, chunk_seed in zip(sizes, seeds):
+            chunks.append(_replicate_chunk(design, size, chunk_seed))
+            if progress is not None:
+                progress(len(chunks) / len(sizes))
+    else:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+
+        # 'spawn' so the workers never fork the server's threads.
+        with ProcessPoolExecutor(max_workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            futures = {pool.submit(_replicate_chunk, design, size, chunk_seed): i
+                       for i, (size, chunk_seed) in enumerate(zip(sizes, seeds))}
+            results = [None] * len(sizes)
+            for done, future in enumerate(as_completed(futures), start=1):
+                results[futures[future]] = future.result()
+                if progress is not None:
+                    progress(done / len(sizes))
+        chunks = results
+
+    tail = (1 - confidence) / 2
+    intervals = {}
+    for name in chunks[0]:
+        values = np.concatenate([chunk[name] for chunk in chunks])
+        low, high = np.quantile(values, [tail, 1 - tail])
+        intervals[name] = (float(low), float(high))
+    return intervals
+
+
+# --- Interval Cache ---
+# One entry per data version (a filtered frame has its own version), shared by all
+# sessions. A plain LRU instead of st.cache_data, because the computation reports
+# progress to the page that triggered it.
+_interval_cache = OrderedDict()
+_interval_lock = threading.Lock()
+
+
+def get_intervals(df, summary, progress=None):
+    """Returns the bootstrap intervals of the headline metrics of a frame."""
+    from aggregates import get_cube
+
+    version = df.attrs.get('data_version')
+    key = (version, BOOTSTRAP_REPLICATES, CONFIDENCE)
+    with _interval_lock:
+        if version is not None and key in _interval_cache:
+            _interval_cache.move_to_end(key)
+            return _interval_cache[key]
+    intervals = bootstrap_intervals(metric_design(get_cube(df), summary), progress=progress)
+    if version is not None:
+        with _interval_lock:
+            _interval_cache[key] = intervals
+            while len(_interval_cache) > INTERVAL_CACHE_SIZE:
+                _interval_cache.popitem(last=False)
+    return intervals
+
+
+def _format_interval(name, low, high):
+    from summary import fmt
+
+    label, suffix = METRIC_LABELS[name]
+    if suffix == '%' or name == 'median_age':
+        return f"{label}: {fmt(low)}–{fmt(high, suffix)}"
+    return f"{label}: {low:.0f}–{high:.0f}"
+
+
+def show_intervals(slot, df, summary, metrics):
+    """Fills slot (an st.empty placed under the metrics) with the intervals.
+
+    Pages call this at their very end, so the metrics and charts are already on
+    screen while the replicates are drawn.
+    """
+    if not intervals_enabled() or summary is None:
+        return
+    bar = slot.progress(0.0, text="Drawing bootstrap replicates...")
+    intervals = get_intervals(
+        df, summary, progress=lambda done: bar.progress(done, text="Drawing bootstrap replicates..."))
+    parts = [_format_interval(name, *intervals[name]) for name in metrics if name in intervals]
+    if not parts:
+        slot.caption("Bootstrap intervals are not available for the selected respondents.")
+        return
+    slot.caption(f"{CONFIDENCE:.0%} bootstrap intervals ({BOOTSTRAP_REPLICATES:,} resamples): "
+                 + " · ".join(parts))
@@ -0,0 +1,420 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from aggregates import box_stats, get_cube, mean_by
+from profiling import profile_section, record_cache
+
+# Plotly is imported inside the functions that draw, not at module level: the
+# pages import this module up front, and plotly then only loads once the first
+# chart actually renders (or earlier, in the background, via startup.warm_up).
+
+# --- Server-Side Box Plots ---
+# Above this many rows the box plots are drawn from statistics computed here
+# (go.Box with q1/median/q3/fences) instead of shipping every value to the
+# browser, so the chart payload stays the same size as the data grows.
+PRECOMPUTE_MIN_ROWS = 5000
+MAX_OUTLIERS_PER_BOX = 50
+
+
+def _use_precomputed(df, precompute):
+    return len(df) >= PRECOMPUTE_MIN_ROWS if precompute is None else precompute
+
+
+def box_chart(df, x, y, color, title, color_sequence, precompute=None):
+    """Grouped box plot of y by x and color, matching px.box for small tables."""
+    import plotly.express as px
+    import plotly.graph_objects as go
+
+    if not _use_precomputed(df, precompute):
+        return px.box(df, x=x, y=y, color=color, title=title,
+                      color_discrete_sequence=color_sequence)
+
+    stats = box_stats(df, x, y, color, max_outliers=MAX_OUTLIERS_PER_BOX)
+    fig = go.Figure()
+    for i, (name, group) in enumerate(stats.groupby(color, observed=True, sort=True)):
+        fig.add_trace(go.Box(
+            name=str(name),
+            x=group[x].astype(str),
+            q1=group['q1'],
+            median=group['median'],
+            q3=group['q3'],
+            lowerfence=group['lowerfence'],
+            upperfence=group['upperfence'],
+            # Under the q1/median/q3 signature y holds each box's sample points,
+            # here only the capped outlier sample.
+            y=list(group['outliers']),
+            boxpoints='outliers',
+            marker_color=color_sequence[i % len(color_sequence)],
+            offsetgroup=str(name),
+        ))
+    fig.update_layout(title=title, boxmode='group', legend_title_text=color)
+    fig.update_xaxes(categoryorder='array', categoryarray=stats[x].astype(str).unique())
+    return fig
+
+
+def histogram_chart(df, x, nbins, title, color_sequence, precompute=None):
+    """Histogram of x with a marginal box plot above it, like px.histogram(marginal='box')."""
+    import plotly.express as px
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
+    if not _use_precomputed(df, precompute):
+        return px.histogram(df, x=x, nbins=nbins, title=title,
+                            color_discrete_sequence=color_sequence, marginal='box')
+
+    cube = get_cube(df)
+    if x in cube.levels:
+        # Low-cardinality columns are binned from the cube's level counts
+        counts, edges = cube.histogram(x, nbins)
+        stats = cube.box_summary(x)
+    else:
+        values = df[x].dropna().to_numpy()
+        counts, edges = np.histogram(values, bins=nbins)
+        stats = box_stats(pd.DataFrame({'all': 'all', x: values}), 'all', x,
+                          max_outliers=MAX_OUTLIERS_PER_BOX).iloc[0]
+
+    # Bottom-left start keeps the histogram on the primary x/y axes (as px does),
+    # so page code can keep styling it through xaxis_title/yaxis_title.
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, start_cell='bottom-left',
+                        row_heights=[0.8, 0.2], vertical_spacing=0.03)
+    fig.add_trace(go.Box(
+        y=[x],
+        q1=[stats['q1']],
+        median=[stats['median']],
+        q3=[stats['q3']],
+        lowerfence=[stats['lowerfence']],
+        upperfence=[stats['upperfence']],
+        x=[stats['outliers']],
+        orientation='h',
+        boxpoints='outliers',
+        marker_color=color_sequence[0],
+        showlegend=False,
+    ), row=2, col=1)
+    fig.add_trace(go.Bar(
+        x=(edges[:-1] + edges[1:]) / 2,
+        y=counts,
+        width=np.diff(edges),
+        marker_color=color_sequence[0],
+        showlegend=False,
+    ), row=1, col=1)
+    fig.update_yaxes(showticklabels=False, row=2, col=1)
+    fig.update_layout(title=title, bargap=0)
+    return fig
+
+
+# --- Page Charts ---
+# Each chart is a pure function of the (filtered) frame and its parameters, so
+# its serialized figure can be cached on (chart, data version, parameters).
+
+
+def age_histogram(df, nbins=10):
+    import plotly.express as px
+
+    # Large tables get server-side bins and box statistics instead of raw values
+    fig = histogram_chart(df, x='age_midpoint', nbins=nbins,
+                          title='Distribution of Age Midpoints',
+                          color_sequence=px.colors.qualitative.T10)
+    fig.update_layout(xaxis_title='Age Midpoint', yaxis_title='Frequency')
+    return fig
+
+
+def marital_pie(df):
+    import plotly.express as px
+
+    marital_counts = get_cube(df).value_counts('marital_status').sort_values(ascending=False)
+    marital_counts = marital_counts[marital_counts > 0].reset_index()
+    marital_counts.columns = ['Marital Status', 'Count']
+    return px.pie(marital_counts, values='Count', names='Marital Status',
+                  title='Marital Status of Addicts', hole=.3)
+
+
+def _crosstab_heatmap(df, index, columns, title, xaxis_title, yaxis_title, colorscale):
+    import plotly.graph_objects as go
+
+    crosstab_data = get_cube(df).crosstab(index, columns)
+    fig = go.Figure(data=go.Heatmap(
+        z=crosstab_data.values,
+        x=crosstab_data.columns,
+        y=crosstab_data.index,
+        colorscale=colorscale
+    ))
+    fig.update_layout(title=title, xaxis_title=xaxis_title, yaxis_title=yaxis_title)
+    return fig
+
+
+def education_mh_heatmap(df, colorscale='Viridis'):
+    return _crosstab_heatmap(df, 'education_level', 'mental_health_status',
+                             'Education Level vs. Mental Health Status',
+                             'Mental Health Status', 'Education Level', colorscale)
+
+
+def marital_problem_heatmap(df, colorscale='Viridis'):
+    return _crosstab_heatmap(df, 'marital_status', 'mental/emotional_problem',
+                             'Marital Status vs. Mental/Emotional Problem',
+                             'Mental/Emotional Problem', 'Marital Status', colorscale)
+
+
+def association_heatmap(df, colorscale='Viridis'):
+    import plotly.graph_objects as go
+    from associations import METHOD_LABELS, association_matrix, get_associations
+
+    pairs = get_associations(df)
+    columns = list(get_cube(df).dims)
+    strength = association_matrix(pairs, columns)
+    methods = association_matrix(pairs.assign(method=pairs['method'].map(METHOD_LABELS)),
+                                 columns, value='method')
+    p_values = association_matrix(pairs, columns, value='p_value')
+    fig = go.Figure(data=go.Heatmap(
+        z=strength.values,
+        x=columns,
+        y=columns,
+        zmin=0,
+        zmax=1,
+        colorscale=colorscale,
+        customdata=np.dstack([methods.values, p_values.values]),
+        texttemplate='%{z:.2f}',
+        hovertemplate='%{y} vs. %{x}<br>%{customdata[0]}: %{z:.3f}<br>p = %{customdata[1]:.2g}'
+                      '<extra></extra>',
+    ))
+    fig.update_layout(title='Association Strength between All Survey Columns', height=750)
+    fig.update_xaxes(tickangle=45)
+    fig.update_yaxes(autorange='reversed')
+    return fig
+
+
+def friends_failure_bar(df):
+    import plotly.express as px
+
+    # One bar per (friends_influence, failure) group instead of one segment per respondent
+    counts = get_cube(df).count_by('friends_influence', 'failure_in_life_numeric')
+    fig = px.bar(counts, x='friends_influence', y='count', color='failure_in_life_numeric',
+                 title='Friends Influence vs. Failure in Life',
+                 labels={'failure_in_life_numeric': 'Failure in Life (1=Yes, 0=No)'},
+                 barmode='group', color_discrete_sequence=px.colors.qualitative.Vivid)
+    fig.update_layout(xaxis_title='Friends Influence', yaxis_title='Count')
+    return fig
+
+
+def addiction_history_bar(df):
+    import plotly.express as px
+
+    counts = get_cube(df).count_by('addicted_with', 'family_history_of_drug_use')
+    fig = px.bar(counts, x='addicted_with', y='count', color='family_history_of_drug_use',
+                 title='Type of Addiction by Family History of Drug Use',
+                 barmode='group', color_discrete_sequence=px.colors.qualitative.Bold)
+    fig.update_layout(xaxis_title='Type of Addiction', yaxis_title='Count')
+    return fig
+
+
+def age_by_status_bar(df):
+    import plotly.express as px
+
+    # Plot the group means (the chart used to stack, i.e. sum, every respondent's value)
+    means = mean_by(df, 'mental_health_status', 'age_midpoint', 'failure_in_life_numeric')
+    fig = px.bar(means, x='mental_health_status', y='age_midpoint',
+                 color='failure_in_life_numeric', hover_data=['count'],
+                 title='Average Age Midpoint by Mental Health Status and Failure in Life',
+                 labels={'failure_in_life_numeric': 'Failure in Life (1=Yes, 0=No)'},
+                 barmode='group', color_discrete_sequence=px.colors.qualitative.Vivid)
+    fig.update_layout(xaxis_title='Mental Health Status', yaxis_title='Average Age Midpoint')
+    return fig
+
+
+# Column names as they read in chart titles, for the box plot grouping options.
+GROUP_LABELS = {
+    'smoking': 'Smoking',
+    'addicted_with': 'Type of Addiction',
+    'gender': 'Gender',
+    'marital_status': 'Marital Status',
+    'friends_influence': 'Friends Influence',
+    'family_history_of_drug_use': 'Family History of Drug Use',
+}
+
+
+def _first_use_box(df, x, color, xaxis_title):
+    import plotly.express as px
+
+    # Large tables get quartiles/fences computed here instead of every raw value
+    title = f'Age of First Use Distribution by {xaxis_title} and {GROUP_LABELS[color]}'
+    fig = box_chart(df, x=x, y='age_of_first_use_midpoint', color=color, title=title,
+                    color_sequence=px.colors.qualitative.Dark24)
+    fig.update_xaxes(tickangle=45)
+    fig.update_layout(xaxis_title=xaxis_title, yaxis_title='Age of First Use (Midpoint)')
+    return fig
+
+
+def problem_smoking_box(df, color='smoking'):
+    return _first_use_box(df, 'mental/emotional_problem', color, 'Mental/Emotional Problem')
+
+
+def religion_addiction_box(df, color='addicted_with'):
+    return _first_use_box(df, 'religion', color, 'Religion')
+
+
+CHARTS = {
+    'age_histogram': age_histogram,
+    'marital_pie': marital_pie,
+    'education_mh_heatmap': education_mh_heatmap,
+    'friends_failure_bar': friends_failure_bar,
+    'addiction_history_bar': addiction_history_bar,
+    'problem_smoking_box': problem_smoking_box,
+    'age_by_status_bar': age_by_status_bar,
+    'marital_problem_heatmap': marital_problem_heatmap,
+    'religion_addiction_box': religion_addiction_box,
+    'association_heatmap': association_heatmap,
+}
+# The CHARTS builders drawn by each page, in page order.
+PAGE_CHARTS = {
+    'main.py': ['age_histogram', 'marital_pie', 'education_mh_heatmap'],
+    'Studying_Social_and_Mental_Health_Risk_Factors_Among_Addicts.py':
+        ['friends_failure_bar', 'addiction_history_bar', 'problem_smoking_box'],
+    'Identifying Correlations between Risk and Life Outcome.py':
+        ['age_by_status_bar', 'marital_problem_heatmap', 'religion_addiction_box',
+         'association_heatmap'],
+}
+
+
+# --- Figure Cache ---
+FIGURE_CACHE_SIZE = 256
+
+
+class FigureCache:
+    """Bounded LRU of serialized figure JSON, shared by every session in the process.
+
+    Next to each JSON spec it keeps the Figure decoded from it, so warm reruns
+    hand st.plotly_chart a ready Figure instead of parsing and validating the
+    JSON again. The decoded Figure is shared by all sessions: treat it as
+    read-only.
+    """
+
+    def __init__(self, maxsize=FIGURE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> [spec, decoded Figure or None]
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, spec):
+        with self._lock:
+            self._entries[key] = [spec, None]
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def figure(self, key, spec):
+        """The Figure decoded from key's spec, decoding it only the first time."""
+        import plotly.io as pio
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is spec and entry[1] is not None:
+                return entry[1]
+        figure = pio.from_json(spec, skip_invalid=True)
+        with self._lock:
+            entry = self._entries.get(key)
+            # Only kept if the spec was not replaced while decoding.
+            if entry is not None and entry[0] is spec:
+                entry[1] = figure
+        return figure
+
+    def items(self):
+        """Snapshot of the cached (key, spec) pairs, least recently used first."""
+        with self._lock:
+            return [(key, entry[0]) for key, entry in self._entries.items()]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+figure_cache = FigureCache()
+
+
+def _figure_key(name, df, params):
+    version = df.attrs.get('data_version')
+    return None if version is None else (name, version, tuple(sorted(params.items())))
+
+
+def figure_json(name, df, **params):
+    """Returns the figure JSON of a chart, built only on a cache miss."""
+    key = _figure_key(name, df, params)
+    spec = figure_cache.get(key) if key is not None else None
+    record_cache('figure', hit=spec is not None)
+    if spec is None:
+        with profile_section('build'):
+            figure = CHARTS[name](df, **params)
+        with profile_section('serialize'):
+            spec = figure.to_json()
+        if key is not None:
+            figure_cache.put(key, spec)
+    return spec
+
+
+def show_chart(name, df, **params):
+    """Renders a chart from the figure cache."""
+    spec = figure_json(name, df, **params)
+    with profile_section('decode'):
+        figure = figure_cache.figure(_figure_key(name, df, params), spec)
+    with profile_section('render'):
+        st.plotly_chart(figure, use_container_width=True)
+
+
+# --- Chart Sections ---
+# Each chart is drawn inside its own st.fragment together with its controls, so
+# changing one chart's options reruns only that fragment, not the whole page.
+COLORSCALES = ['Viridis', 'Cividis', 'Blues', 'YlOrRd', 'RdBu']
+
+
+def _histogram_controls(key):
+    return {'nbins': st.slider("Number of bins", 5, 30, 10, key=f"{key}_nbins")}
+
+
+def _heatmap_controls(key):
+    return {'colorscale': st.selectbox("Colour scale", COLORSCALES, key=f"{key}_colorscale")}
+
+
+def _box_controls(options):
+    def controls(key):
+        color = st.selectbox("Group by", options, format_func=GROUP_LABELS.get,
+                             key=f"{key}_color")
+        return {'color': color}
+    return controls
+
+
+CHART_CONTROLS = {
+    'age_histogram': _histogram_controls,
+    'education_mh_heatmap': _heatmap_controls,
+    'marital_problem_heatmap': _heatmap_controls,
+    'association_heatmap': _heatmap_controls,
+    'problem_smoking_box': _box_controls(
+        ['smoking', 'gender', 'friends_influence', 'family_history_of_drug_use']),
+    'religion_addiction_box': _box_controls(['addicted_with', 'gender', 'marital_status']),
+}
+
+
+@st.fragment
+def chart_section(name, df, missing_message):
+    """Draws one chart with its own controls as an independently rerunnable fragment."""
+    params = {}
+    if name in CHART_CONTROLS:
+        with st.expander("Chart options"):
+            params = CHART_CONTROLS[name](name)
+    with profile_section(f'chart: {name}'):
+        try:
+            show_chart(name, df, **params)
+        except KeyError:
+            st.warning(missing_message)
@@ -0,0 +1,233 @@
+import hashlib
+import json
+import logging
+import os
+
+import pandas as pd
+import pyarrow as pa
+import streamlit as st
+
+from preprocess import derive_columns
+from profiling import cache_probe, mark_miss, record_cache
+from schema import CATEGORY_ORDER, NUMERIC_DTYPES, SCHEMA_VERSION
+
+logger = logging.getLogger(__name__)
+
+# --- Data Source Locations ---
+# The bundled copy of the survey table lives next to this file; the GitHub copy
+# is only used when the caller explicitly allows it, or always with
+# SCV_DATA_SOURCE=remote (see remote.py).
+# SCV_DATA_PATH points the dashboard at another CSV with the same schema (the
+# benchmark harness uses it for synthetic tables).
+LOCAL_PATH = os.environ.get('SCV_DATA_PATH') or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'df.csv')
+REMOTE_URL = (os.environ.get('SCV_REMOTE_URL')
+              or 'https://raw.githubusercontent.com/ainagif/SCV/refs/heads/main/df.csv')
+DATA_SOURCE = os.environ.get('SCV_DATA_SOURCE', 'auto')
+
+# Columnar copy of df.csv (Arrow IPC, uncompressed so it can be memory-mapped).
+CACHE_PATH = os.path.splitext(LOCAL_PATH)[0] + '.arrow'
+CACHE_META_KEY = b'scv_source'
+
+# Survey waves appended with store.py. When this store exists the dashboard
+# reads it instead of the single CSV (store.py seeds a new store with the CSV).
+STORE_PATH = os.environ.get('SCV_STORE_PATH') or os.path.splitext(LOCAL_PATH)[0] + '.store'
+STORE_MANIFEST = 'manifest.json'
+
+
+def apply_schema(raw_df, strict=False):
+    """Converts the raw survey table to the compact typed schema.
+
+    With strict=True, answers outside the declared categories raise a ValueError
+    (listing all of them) instead of being appended to the categories, so every
+    chunk or wave gets exactly the same coding.
+    """
+    typed = {}
+    undeclared = {}
+    for col in raw_df.columns:
+        values = raw_df[col]
+        if col in CATEGORY_ORDER:
+            categories = CATEGORY_ORDER[col]
+            # Answers outside the declared order are kept (appended at the end)
+            # rather than silently turned into NaN.
+            unknown = sorted(set(values.dropna().unique()) - set(categories))
+            if unknown and strict:
+                undeclared[col] = unknown
+            elif unknown:
+                logger.warning("Column %r has undeclared answers %s", col, unknown)
+                categories = categories + unknown
+            typed[col] = pd.Categorical(values, categories=categories, ordered=True)
+        elif col in NUMERIC_DTYPES:
+            dtype = NUMERIC_DTYPES[col]
+            # Integer columns fall back to float32 if there are missing values.
+            if dtype.startswith('int') and values.isna().any():
+                dtype = 'float32'
+            typed[col] = values.astype(dtype)
+        else:
+            typed[col] = values
+    if undeclared:
+        raise ValueError(f"Undeclared answers: {undeclared}")
+    return pd.DataFrame(typed, index=raw_df.index)
+
+
+def memory_usage(frame):
+    """Returns the deep memory footprint of a dataframe in bytes."""
+    return int(frame.memory_usage(deep=True).sum())
+
+
+# --- Columnar Cache ---
+def file_digest(path, chunk_size=1 << 20):
+    """Returns the sha256 hex digest of a file, read in fixed-size chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _read_cache_meta(cache_path):
+    """Returns the source fingerprint stored in a columnar cache, or None."""
+    try:
+        with pa.memory_map(cache_path) as source:
+            metadata = pa.ipc.open_file(source).schema.metadata or {}
+        return json.loads(metadata[CACHE_META_KEY])
+    except (OSError, KeyError, ValueError, pa.ArrowInvalid):
+        return None
+
+
+def _write_cache(df, cache_path, meta):
+    """Writes the typed frame as an Arrow IPC file, replacing any old cache atomically."""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[CACHE_META_KEY] = json.dumps(meta).encode()
+    table = table.replace_schema_metadata(metadata)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        # A read-only checkout still works, it just re-parses the CSV every time.
+        logger.warning("Could not write columnar cache %s: %s", cache_path, e)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _read_cache(cache_path):
+    """Memory-maps the columnar cache; numeric columns stay backed by the mapped pages."""
+    with pa.memory_map(cache_path) as source:
+        table = pa.ipc.open_file(source).read_all()
+    return table.to_pandas(split_blocks=True)
+
+
+def load_columnar(csv_path=LOCAL_PATH, cache_path=CACHE_PATH):
+    """Loads the typed survey table through the Arrow cache stored next to the CSV.
+
+    The cache is valid when it was written for the same schema and the CSV has the
+    same size and mtime. If only the mtime differs (e.g. after a fresh checkout)
+    the content hash decides, so an unchanged file is never re-parsed.
+    """
+    stat = os.stat(csv_path)
+    meta = _read_cache_meta(cache_path)
+    if meta is not None and meta['schema'] == SCHEMA_VERSION and meta['size'] == stat.st_size:
+        if meta['mtime_ns'] == stat.st_mtime_ns:
+            record_cache('arrow_file', hit=True)
+            df = _read_cache(cache_path)
+            df.attrs['data_version'] = meta['sha256']
+            return df
+        if file_digest(csv_path) == meta['sha256']:
+            record_cache('arrow_file', hit=True)
+            df = _read_cache(cache_path)
+            meta['mtime_ns'] = stat.st_mtime_ns
+            _write_cache(df, cache_path, meta)
+            df.attrs['data_version'] = meta['sha256']
+            return df
+
+    record_cache('arrow_file', hit=False)
+    # Raw survey exports get their numeric columns derived from the text answers.
+    raw_df = derive_columns(pd.read_csv(csv_path))
+    df = apply_schema(raw_df)
+    before, after = memory_usage(raw_df), memory_usage(df)
+    logger.info(
+        "Parsed %d rows from %s: %.1f KiB raw -> %.1f KiB typed (%.1f bytes/row)",
+        len(df), csv_path, before / 1024, after / 1024, after / max(len(df), 1),
+    )
+    meta = {
+        'schema': SCHEMA_VERSION,
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': file_digest(csv_path),
+    }
+    _write_cache(df, cache_path, meta)
+    df.attrs['data_version'] = meta['sha256']
+    return df
+
+
+def store_signature(store_path=STORE_PATH):
+    """Returns (mtime, size) of the store manifest, or None if there is no store.
+
+    Cheap enough to check on every rerun; it changes whenever a wave is appended.
+    """
+    try:
+        stat = os.stat(os.path.join(store_path, STORE_MANIFEST))
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def data_version(df):
+    """Returns the fingerprint of the data a frame was loaded from, if known."""
+    return df.attrs.get('data_version')
+
+
+# st.cache_resource keeps one copy of the frame for the whole process, so every
+# page and every session reads the same object. Callers must treat it as read-only.
+# The store signature and the remote copy's version are part of the key: after a
+# wave is appended or the remote copy is refreshed, the next rerun loads the new
+# data, and the superseded frame is evicted.
+@st.cache_resource(max_entries=2, show_spinner="Loading survey data...")
+def _load_shared(allow_remote, signature=None, remote_version=None):
+    # Prefer the wave store, then the bundled df.csv (via its columnar cache); the
+    # remote copy is only read when neither exists and the caller allowed it.
+    mark_miss()
+    if remote_version is not None:
+        from remote import remote_source
+
+        source = remote_source()
+        return load_columnar(source.copy_path, source.arrow_path)
+    if signature is not None:
+        from store import load_store
+
+        return load_store(STORE_PATH)
+    if os.path.exists(LOCAL_PATH):
+        return load_columnar()
+    raise FileNotFoundError(f"{LOCAL_PATH} not found and remote loading is disabled.")
+
+
+def _remote_version(allow_remote):
+    """Version of the remote copy on disk when the remote source is used, else None.
+
+    Only the first load ever waits for a download; afterwards a stale copy is
+    served while a background thread revalidates it.
+    """
+    if DATA_SOURCE != 'remote' and (not allow_remote or os.path.exists(LOCAL_PATH)):
+        return None
+    from remote import remote_source
+
+    source = remote_source()
+    version = source.ensure_copy()
+    source.refresh_if_stale()
+    return version
+
+
+def load_data(allow_remote=False):
+    """Returns the shared survey dataframe, or an empty one if loading fails."""
+    try:
+        signature = None if DATA_SOURCE == 'remote' else store_signature()
+        remote_version = _remote_version(allow_remote) if signature is None else None
+        with cache_probe('shared_frame'):
+            return _load_shared(allow_remote, signature, remote_version)
+    except Exception as e:
+        st.error(f"Error loading data: {e}")
+        return pd.DataFrame()
@@ -0,0 +1,446 @@
+import argparse
+import hashlib
+import html
+import json
+import logging
+import os
+import re
+import shutil
+import sys
+import time
+import urllib.request
+
+logger = logging.getLogger(__name__)
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+EXPORT_DIR = os.path.join(APP_DIR, 'site')
+MANIFEST_FILE = 'manifest.json'
+PAGE_TIMEOUT = 900
+IMAGE_TIMEOUT = 30
+
+# --- Static Snapshot Export ---
+# Renders every page headlessly (AppTest, so the page scripts and the chart
+# builders are exactly the ones the live dashboard runs) and writes the result as
+# plain HTML that any static file server or CDN can serve:
+#   <page>.html                  text, metrics and placeholders for the charts
+#   assets/plotly-<version>.js   plotly.js, shared by every page
+#   assets/template-<hash>.js    plotly templates, shared by every figure
+#   charts/<name>-<hash>.js      one minified figure each, named by content
+#   assets/images/               local copies of the pages' remote images
+# Files named by content never change, so they can be cached forever.
+#
+# The manifest remembers each chart's figure cache key (chart, data version,
+# parameters). The next export puts those figures back into charts.figure_cache
+# before running the pages, so only charts whose data fingerprint changed are
+# rebuilt. A change to the builder code invalidates all of them.
+
+# Page script -> (output file, navigation title), in sidebar.py's menu order.
+EXPORT_PAGES = {
+    'home.py': ('index.html', 'Homepage'),
+    'main.py': ('main.html', 'main'),
+    'Studying_Social_and_Mental_Health_Risk_Factors_Among_Addicts.py':
+        ('social-factors.html', 'Studying Social and Mental Health Risk Factors Among Addicts'),
+    'Identifying Correlations between Risk and Life Outcome.py':
+        ('correlations.html', 'Identifying Correlations between Risk and Life Outcome'),
+}
+BUILDER_MODULES = ['charts.py', 'aggregates.py', 'associations.py', 'preprocess.py', 'schema.py']
+# Bump when the layout of the exported files changes.
+EXPORT_FORMAT = 1
+
+SCRIPT = """\
+var SCV_TEMPLATES = {};
+function scvTemplate(hash, template) { SCV_TEMPLATES[hash] = template; }
+function scvFigure(id, figure, template) {
+  var layout = Object.assign({}, figure.layout, {autosize: true});
+  if (template) { layout.template = SCV_TEMPLATES[template]; }
+  document.querySelectorAll('[data-figure="' + id + '"]').forEach(function (el) {
+    Plotly.newPlot(el, figure.data, layout, {responsive: true, displaylogo: false});
+  });
+}
+"""
+STYLE = """\
+body { font-family: "Source Sans Pro", sans-serif; color: #31333f; margin: 0; }
+nav { background: #f0f2f6; padding: 0.75rem 2rem; }
+nav a { margin-right: 1.5rem; color: #31333f; text-decoration: none; }
+nav a.current { font-weight: 600; }
+main { max-width: 1200px; margin: 0 auto; padding: 1rem 2rem 3rem; }
+img { max-width: 100%; }
+.row { display: flex; gap: 1rem; }
+.row > .col { flex: 1; min-width: 0; }
+.metric .label { font-size: 0.875rem; }
+.metric .value { font-size: 2.25rem; }
+.alert { padding: 1rem; border-radius: 0.5rem; margin: 1rem 0; }
+.alert.success { background: #dff5e3; color: #177233; }
+.alert.info { background: #e0effe; color: #0054a3; }
+.alert.warning { background: #fffce7; color: #926c05; }
+.alert.error { background: #ffecec; color: #7d353b; }
+.caption { font-size: 0.875rem; color: #808495; }
+.chart { width: 100%; height: 450px; }
+footer { color: #808495; font-size: 0.8rem; padding: 1rem 2rem; }
+"""
+
+
+# --- Text ---
+def _inline(text):
+    text = html.escape(text, quote=False)
+    text = re.sub(r'\*\*(.+?)\*\*', r'<strong>\1</strong>', text)
+    text = re.sub(r'(?<![\w*])\*(?!\s)(.+?)(?<!\s)\*', r'<em>\1</em>', text)
+    return re.sub(r'`(.+?)`', r'<code>\1</code>', text)
+
+
+def markdown_html(text):
+    """The markdown subset the pages use: paragraphs, '- ' lists, '---' rules, emphasis."""
+    parts = []
+    for block in re.split(r'\n\s*\n', text.strip()):
+        lines = [line.strip() for line in block.splitlines() if line.strip()]
+        if lines == ['---']:
+            parts.append('<hr>')
+            continue
+        paragraph, items = [], []
+        for line in lines:
+            if line.startswith(('- ', '* ')):
+                if paragraph:
+                    parts.append('<p>' + ' '.join(paragraph) + '</p>')
+                    paragraph = []
+                items.append(f'<li>{_inline(line[2:])}</li>')
+            else:
+                if items:
+                    parts.append('<ul>' + ''.join(items) + '</ul>')
+                    items = []
+                paragraph.append(_inline(line))
+        if paragraph:
+            parts.append('<p>' + ' '.join(paragraph) + '</p>')
+        if items:
+            parts.append('<ul>' + ''.join(items) + '</ul>')
+    return '\n'.join(parts)
+
+
+# --- Charts ---
+def _content_hash(text):
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+
+def builder_fingerprint():
+    """Hash of the chart builder sources; cached figures are only reused while it holds."""
+    digest = hashlib.sha256(str(EXPORT_FORMAT).encode())
+    for module in BUILDER_MODULES:
+        with open(os.path.join(APP_DIR, module), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def split_template(spec):
+    """Splits figure JSON into minified figure JSON and its template (or None)."""
+    figure = json.loads(spec)
+    template = figure.get('layout', {}).pop('template', None)
+    compact = json.dumps(figure, separators=(',', ':'), ensure_ascii=False)
+    if template is None:
+        return compact, None
+    return compact, json.dumps(template, separators=(',', ':'), ensure_ascii=False)
+
+
+def _figure_script(figure_id, compact, template_hash):
+    template_arg = f'"{template_hash}"' if template_hash else 'null'
+    return f'scvFigure("{figure_id}", {compact}, {template_arg});\n'
+
+
+def _template_script(template_hash, template):
+    return f'scvTemplate("{template_hash}", {template});\n'
+
+
+def _write_if_changed(path, text):
+    # Unchanged files keep their mtime, so syncing the bundle to a server is cheap.
+    try:
+        with open(path, encoding='utf-8') as f:
+            if f.read() == text:
+                return False
+    except FileNotFoundError:
+        pass
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+    return True
+
+
+class Bundle:
+    """The files of one export, with the manifest of the previous one."""
+
+    def __init__(self, out_dir, full=False):
+        self.out_dir = out_dir
+        for sub in ('assets', 'charts', os.path.join('assets', 'images')):
+            os.makedirs(os.path.join(out_dir, sub), exist_ok=True)
+        self.fingerprint = builder_fingerprint()
+        previous = {}
+        try:
+            with open(os.path.join(out_dir, MANIFEST_FILE)) as f:
+                previous = json.load(f)
+        except (OSError, ValueError):
+            pass
+        self.previous = previous if not full else {}
+        self.charts = {}      # chart file -> {'key': ..., 'template': ...}
+        self.templates = set()
+        self.images = {}      # url -> local path
+        self.pages = {}       # page file -> title
+        self.plotly_file = None
+        self.written = 0
+
+    def seed_figure_cache(self):
+        """Puts the previous export's figures back into charts.figure_cache."""
+        from charts import figure_cache
+
+        if self.previous.get('builder') != self.fingerprint:
+            return 0
+        seeded = 0
+        for chart_file, entry in self.previous.get('charts', {}).items():
+            if entry['key'] is None:
+                continue
+            try:
+                figure = json.loads(self._read_script(
+                    os.path.join('charts', chart_file),
+                    _figure_script(chart_file[:-3], '\0', entry['template'])))
+                if entry['template'] is not None:
+                    figure['layout']['template'] = json.loads(self._read_script(
+                        os.path.join('assets', f"template-{entry['template']}.js"),
+                        _template_script(entry['template'], '\0')))
+            except (OSError, ValueError, KeyError):
+                continue
+            name, version, params = entry['key']
+            key = (name, version, tuple(tuple(item) for item in params))
+            figure_cache.put(key, json.dumps(figure))
+            seeded += 1
+        return seeded
+
+    def _read_script(self, relative_path, empty_script):
+        # The JSON payload of a script written by _figure_script/_template_script;
+        # empty_script is the same call with '\0' as the payload.
+        with open(os.path.join(self.out_dir, relative_path), encoding='utf-8') as f:
+            text = f.read()
+        prefix, suffix = empty_script.split('\0')
+        if not (text.startswith(prefix) and text.endswith(suffix)):
+            raise ValueError(f"{relative_path} is not an exported script")
+        return text[len(prefix):len(text) - len(suffix)]
+
+    def add_chart(self, name, spec, key):
+        """Writes one figure (if new) and returns its chart file name."""
+        compact, template = split_template(spec)
+        template_hash = None
+        if template is not None:
+            template_hash = _content_hash(template)
+            if template_hash not in self.templates:
+                self.templates.add(template_hash)
+                self.write(os.path.join('assets', f'template-{template_hash}.js'),
+                            _template_script(template_hash, template))
+        chart_file = f"{name}-{_content_hash(compact)}.js"
+        self.write(os.path.join('charts', chart_file),
+                    _figure_script(chart_file[:-3], compact, template_hash))
+        self.charts[chart_file] = {
+            'key': None if key is None else [key[0], key[1], [list(item) for item in key[2]]],
+            'template': template_hash,
+        }
+        return chart_file
+
+    def add_image(self, url):
+        """Returns a local copy of a remote image, or the URL if it cannot be fetched."""
+        if not url.startswith(('http://', 'https://')):
+            return url
+        if url in self.images:
+            return self.images[url]
+        local = self.previous.get('images', {}).get(url)
+        if local is None or not os.path.exists(os.path.join(self.out_dir, local)):
+            extension = os.path.splitext(url.split('?')[0])[1] or '.img'
+            local = f"assets/images/{_content_hash(url)}{extension}"
+            try:
+                with urllib.request.urlopen(url, timeout=IMAGE_TIMEOUT) as response:
+                    data = response.read()
+            except OSError as e:
+                logger.warning("Could not fetch %s, linking the remote image: %s", url, e)
+                return url
+            with open(os.path.join(self.out_dir, local), 'wb') as f:
+                f.write(data)
+        self.images[url] = local
+        return local
+
+    def write(self, relative_path, text):
+        if _write_if_changed(os.path.join(self.out_dir, relative_path), text):
+            self.written += 1
+
+    def copy_plotly(self):
+        import plotly
+
+        self.plotly_file = f'plotly-{plotly.__version__}.min.js'
+        target = os.path.join(self.out_dir, 'assets', self.plotly_file)
+        if not os.path.exists(target):
+            shutil.copyfile(os.path.join(os.path.dirname(plotly.__file__), 'package_data',
+                                         'plotly.min.js'), target)
+        self.write(os.path.join('assets', 'scv.js'), SCRIPT)
+        self.write(os.path.join('assets', 'scv.css'), STYLE)
+        return f'assets/{self.plotly_file}'
+
+    def finish(self, data_version):
+        """Writes the manifest and removes chart, template and image files no longer used."""
+        keep = {
+            'charts': set(self.charts),
+            'assets': {f'template-{h}.js' for h in self.templates}
+                      | {'scv.js', 'scv.css', 'images', self.plotly_file},
+            os.path.join('assets', 'images'): {os.path.basename(p) for p in self.images.values()},
+        }
+        removed = 0
+        for sub, names in keep.items():
+            for name in os.listdir(os.path.join(self.out_dir, sub)):
+                if name not in names:
+                    os.remove(os.path.join(self.out_dir, sub, name))
+                    removed += 1
+        _write_if_changed(os.path.join(self.out_dir, MANIFEST_FILE), json.dumps({
+            'format': EXPORT_FORMAT,
+            'builder': self.fingerprint,
+            'data_version': data_version,
+            'pages': self.pages,
+            'charts': self.charts,
+            'images': self.images,
+        }, indent=2))
+        return removed
+
+
+# --- Pages ---
+def _render(node, bundle, page_charts):
+    """HTML of one AppTest node and its children; widgets and expanders are left out."""
+    kind = getattr(node, 'type', None)
+    if kind in ('title', 'header', 'subheader'):
+        tag = {'title': 'h1', 'header': 'h2', 'subheader': 'h3'}[kind]
+        return f'<{tag}>{_inline(node.value)}</{tag}>'
+    if kind == 'markdown':
+        return markdown_html(node.value)
+    if kind == 'caption':
+        return f'<div class="caption">{markdown_html(node.value)}</div>'
+    if kind in ('success', 'info', 'warning', 'error'):
+        return f'<div class="alert {kind}">{markdown_html(node.value)}</div>'
+    if kind == 'metric':
+        help_text = html.escape(node.proto.help)
+        return (f'<div class="metric" title="{help_text}"><div class="label">{_inline(node.label)}</div>'
+                f'<div class="value">{html.escape(str(node.value))}</div></div>')
+    if kind == 'image':
+        return '\n'.join(
+            f'<figure><img src="{html.escape(bundle.add_image(img.url))}" alt="{html.escape(img.caption)}">'
+            + (f'<figcaption class="caption">{html.escape(img.caption)}</figcaption>' if img.caption else '')
+            + '</figure>'
+            for img in node.proto.imgs)
+    if kind == 'plotly_chart':
+        chart_file = page_charts.pop(0)
+        return f'<div class="chart" data-figure="{chart_file[:-3]}"></div>'
+    if kind == 'expander':
+        return ''  # only the charts' option widgets live in expanders
+    children = [_render(child, bundle, page_charts) for child in getattr(node, 'children', {}).values()]
+    children = [child for child in children if child]
+    if kind == 'column':
+        return '<div class="col">' + '\n'.join(children) + '</div>'
+    if kind == 'flex_container' and any(getattr(child, 'type', None) == 'column'
+                                        for child in node.children.values()):
+        return '<div class="row">' + '\n'.join(children) + '</div>'
+    return '\n'.join(children)
+
+
+def _chart_keys(names, version):
+    # Figure cache key of each chart drawn with the page's default parameters.
+    from charts import figure_cache
+
+    keys = {key[0]: key for key, _ in figure_cache.items() if key[1] == version}
+    return [keys.get(name) for name in names]
+
+
+def page_html(page, app, bundle, data_version, plotly_path):
+    """Renders one finished AppTest run of a page as a static HTML document."""
+    from charts import PAGE_CHARTS
+
+    elements = app.get('plotly_chart')
+    names = PAGE_CHARTS.get(page, [])
+    if len(names) != len(elements):
+        # A chart fell back to a warning (missing column): name the charts by position.
+        names = [f'chart{i + 1}' for i in range(len(elements))]
+    keys = _chart_keys(names, data_version) if data_version is not None else [None] * len(names)
+    chart_files = [bundle.add_chart(name, element.proto.spec, key)
+                   for name, element, key in zip(names, elements, keys)]
+
+    out_file, title = EXPORT_PAGES[page]
+    current = ' class="current"'
+    links = ''.join(
+        f'<a href="{target}"{current if target == out_file else ""}>{html.escape(label)}</a>'
+        for target, label in EXPORT_PAGES.values())
+    body = _render(app.main, bundle, list(chart_files))
+    scripts = ''
+    if chart_files:
+        templates = sorted({bundle.charts[f]['template'] for f in chart_files} - {None})
+        scripts = '\n'.join(
+            [f'<script src="{plotly_path}"></script>', '<script src="assets/scv.js"></script>']
+            + [f'<script src="assets/template-{h}.js"></script>' for h in templates]
+            + [f'<script src="charts/{f}"></script>' for f in chart_files])
+    footer = f'Static snapshot, data version {data_version[:12]}' if data_version else 'Static snapshot'
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{html.escape(title)}</title>
+<link rel="stylesheet" href="assets/scv.css">
+</head>
+<body>
+<nav>{links}</nav>
+<main>
+{body}
+</main>
+<footer>{footer}</footer>
+{scripts}
+</body>
+</html>
+"""
+
+
+def export_site(out_dir=EXPORT_DIR, full=False):
+    """Exports the pages to out_dir; returns a summary of what was (re)built."""
+    sys.path.insert(0, APP_DIR)
+    from streamlit.testing.v1 import AppTest
+
+    from charts import figure_cache
+    from data import data_version, load_data
+
+    bundle = Bundle(out_dir, full=full)
+    bundle.seed_figure_cache()
+    misses_before = figure_cache.misses
+    version = data_version(load_data())
+    plotly_path = bundle.copy_plotly()
+    for page in EXPORT_PAGES:
+        start = time.perf_counter()
+        app = AppTest.from_file(os.path.join(APP_DIR, page), default_timeout=PAGE_TIMEOUT).run()
+        if app.exception:
+            raise RuntimeError(f"{page} failed: {app.exception[0].value}")
+        out_file, title = EXPORT_PAGES[page]
+        text = page_html(page, app, bundle, version, plotly_path)
+        bundle.write(out_file, text)
+        bundle.pages[out_file] = title
+        logger.info("%s -> %s in %.2fs", page, out_file, time.perf_counter() - start)
+    removed = bundle.finish(version)
+    rebuilt = figure_cache.misses - misses_before
+    return {'pages': len(bundle.pages), 'charts': len(bundle.charts), 'rebuilt': rebuilt,
+            'reused': max(len(bundle.charts) - rebuilt, 0),
+            'written': bundle.written, 'removed': removed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the dashboard pages as a static HTML bundle.")
+    parser.add_argument('--out', default=EXPORT_DIR)
+    parser.add_argument('--full', action='store_true', help="rebuild every chart")
+    args = parser.parse_args()
+    # Only this module's progress; the pages' profiling records are not of interest here.
+    logging.basicConfig(level=logging.WARNING, format='%(message)s')
+    logger.setLevel(logging.INFO)
+
+    start = time.perf_counter()
+    result = export_site(args.out, args.full)
+    print(f"{args.out}: {result['pages']} pages, {result['charts']} charts "
+          f"({result['rebuilt']} rebuilt, {result['reused']} reused from the last export), "
+          f"{result['written']} files written, {result['removed']} removed "
+          f"in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+import hashlib
+from functools import lru_cache
+
+import streamlit as st
+
+from profiling import mark_miss, record_cache
+from schema import CATEGORY_ORDER
+
+# sidebar.py imports this module on every page, including the home page, so numpy
+# is imported inside the bitmap index methods rather than here.
+
+# --- Sidebar Filters ---
+# Columns offered as filters, with the label shown in the sidebar.
+FILTER_COLUMNS = {
+    'gender': 'Gender',
+    'age': 'Age band',
+    'religion': 'Religion',
+    'marital_status': 'Marital status',
+    'education_level': 'Education level',
+    'addicted_with': 'Addicted with',
+    'smoking': 'Smoking',
+    'mental_health_status': 'Mental health status',
+}
+FILTER_CACHE_SIZE = 32
+
+
+def _widget_key(col):
+    return f"filter_{col}"
+
+
+def filter_controls():
+    """Draws one multiselect per filter column in the sidebar (empty = no filter).
+
+    Called from sidebar.py, the navigation entrypoint, so the selection is kept
+    while moving between pages and applies to every chart.
+    """
+    with st.sidebar.expander("Filters", expanded=False):
+        for col, label in FILTER_COLUMNS.items():
+            st.multiselect(label, CATEGORY_ORDER[col], key=_widget_key(col))
+
+
+def current_selection():
+    """Returns the active filter selection as a hashable, order-independent key."""
+    selection = []
+    for col in FILTER_COLUMNS:
+        values = st.session_state.get(_widget_key(col)) or []
+        if values:
+            selection.append((col, tuple(sorted(values))))
+    return tuple(selection)
+
+
+class FilterIndex:
+    """Bitmap index with one packed bit-vector per category value of each filter column.
+
+    A selection is resolved with vectorized OR (values within a column) and AND
+    (across columns) over the bitmaps. The matching row positions are memoized in
+    an LRU keyed on the selection, and the filtered frame is taken from them on
+    each call: caching the frames themselves would keep up to cache_size copies
+    of the table alive. The positions cost 4 bytes per selected row (8 above
+    2**31 rows), i.e. at most 40 MB per entry for a 10M-row table.
+    """
+
+    def __init__(self, df, columns=FILTER_COLUMNS, cache_size=FILTER_CACHE_SIZE):
+        import numpy as np
+
+        self.df = df
+        self.n_rows = len(df)
+        self.bitmaps = {}
+        for col in columns:
+            if col not in df.columns:
+                continue
+            codes = df[col].cat.codes.to_numpy()
+            self.bitmaps[col] = {
+                level: np.packbits(codes == code)
+                for code, level in enumerate(df[col].cat.categories)
+            }
+        self.rows = lru_cache(maxsize=cache_size)(self._rows)
+
+    def mask(self, selection):
+        """Returns the boolean row mask for a selection of (column, values) pairs."""
+        import numpy as np
+
+        combined = None
+        for col, values in selection:
+            if col not in self.bitmaps:
+                raise KeyError(col)
+            empty = np.zeros((self.n_rows + 7) // 8, dtype=np.uint8)
+            column_bits = np.bitwise_or.reduce(
+                [self.bitmaps[col].get(value, empty) for value in values]
+            )
+            combined = column_bits if combined is None else combined & column_bits
+        if combined is None:
+            return np.ones(self.n_rows, dtype=bool)
+        return np.unpackbits(combined, count=self.n_rows).view(bool)
+
+    def _rows(self, selection):
+        import numpy as np
+
+        positions = np.flatnonzero(self.mask(selection))
+        if self.n_rows < 2 ** 31:
+            positions = positions.astype(np.int32)
+        positions.flags.writeable = False  # shared by every session
+        return positions
+
+    def apply(self, selection):
+        """Returns the rows of the frame matching a selection of (column, values) pairs."""
+        if not selection:
+            return self.df
+        filtered = self.df.take(self.rows(selection))
+        # Downstream caches (cube, figures) key on the data version, so a filtered
+        # frame gets its own version derived from the base one and the selection.
+        selection_hash = hashlib.sha1(repr(selection).encode()).hexdigest()[:12]
+        filtered.attrs['data_version'] = f"{self.df.attrs.get('data_version')}:{selection_hash}"
+        return filtered
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def _index_for_version(version, _df):
+    mark_miss()
+    return FilterIndex(_df)
+
+
+def get_filter_index(df):
+    """Returns the filter index for a frame, built once per data version."""
+    version = df.attrs.get('data_version')
+    if version is None:
+        return FilterIndex(df)
+    return _index_for_version(version, df)
+
+
+def apply_filters(df, selection=None):
+    """Returns the rows of df matching the sidebar selection (df itself if none)."""
+    if selection is None:
+        selection = current_selection()
+    if df.empty or not selection:
+        return df
+    index = get_filter_index(df)
+    hits = index.rows.cache_info().hits
+    filtered = index.apply(selection)
+    record_cache('filter_rows', hit=index.rows.cache_info().hits > hits)
+    return filtered
@@ -0,0 +1,327 @@
+import argparse
+import asyncio
+import datetime
+import gc
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+
+from bench import PAGES, synthetic_csv
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+ENTRYPOINT = 'sidebar.py'
+DEFAULT_PORT = 8599
+STARTUP_TIMEOUT = 60
+RERUN_TIMEOUT = 900
+LARGE_OBJECT_MIB = 1.0
+
+# --- Multi-Session Load Test ---
+# Starts the dashboard (streamlit run sidebar.py) and drives it with N simulated
+# viewers over the same websocket protocol the browser uses: every viewer opens a
+# session and reruns the st.navigation pages one after another, each starting on
+# a different page so the sessions overlap on all of them. A rerun's latency is
+# the time from the rerun request to the server's script_finished message.
+# The server's resident memory is read from /proc (Linux) after one warm-up
+# viewer has visited every page, and again while all N sessions are connected;
+# the difference divided by N is the memory each extra viewer costs.
+
+
+def _status_kib(pid, field):
+    # VmRSS is the current resident set, VmHWM its peak.
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            if line.startswith(field + ':'):
+                return int(line.split()[1])
+    return 0
+
+
+def start_server(port, csv_path=None):
+    """Starts the dashboard headless on port and waits until it answers."""
+    env = dict(os.environ)
+    if csv_path is not None:
+        env['SCV_DATA_PATH'] = csv_path
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'streamlit', 'run', ENTRYPOINT,
+         '--server.headless', 'true', '--server.port', str(port),
+         '--server.fileWatcherType', 'none', '--browser.gatherUsageStats', 'false'],
+        cwd=APP_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"streamlit exited with code {server.returncode}")
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}/_stcore/health', timeout=1):
+                return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError(f"streamlit did not answer on port {port} within {STARTUP_TIMEOUT}s")
+
+
+class ViewerSession:
+    """One simulated viewer: a websocket session that reruns pages like the browser does."""
+
+    def __init__(self, url):
+        self.url = url
+        self.pages = []  # (page_script_hash, url_pathname, page_name) from st.navigation
+        self._ws = None
+
+    async def open(self):
+        from websockets.asyncio.client import connect
+
+        self._ws = await connect(self.url, subprotocols=['streamlit'], max_size=None)
+
+    async def close(self):
+        await self._ws.close()
+
+    async def rerun(self, page=None):
+        """Runs a page (the default page if None); returns (seconds, ok, error)."""
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        message = BackMsg()
+        message.rerun_script.query_string = ''
+        if page is not None:
+            message.rerun_script.page_script_hash = page[0]
+            message.rerun_script.page_name = page[1]
+        start = time.perf_counter()
+        await self._ws.send(message.SerializeToString())
+        error = None
+        while True:
+            reply = ForwardMsg()
+            reply.ParseFromString(await asyncio.wait_for(self._ws.recv(), RERUN_TIMEOUT))
+            kind = reply.WhichOneof('type')
+            if kind == 'navigation':
+                self.pages = [(p.page_script_hash, p.url_pathname, p.page_name)
+                              for p in reply.navigation.app_pages]
+            elif (kind == 'delta' and reply.delta.WhichOneof('type') == 'new_element'
+                  and reply.delta.new_element.WhichOneof('type') == 'exception'):
+                error = reply.delta.new_element.exception.message
+            elif kind == 'script_finished':
+                status = ForwardMsg.ScriptFinishedStatus.Name(reply.script_finished)
+                ok = status == 'FINISHED_SUCCESSFULLY' and error is None
+                return time.perf_counter() - start, ok, error or (None if ok else status)
+
+
+async def _viewer(url, index, rounds, think, records):
+    session = ViewerSession(url)
+    await session.open()
+    await session.rerun()
+    pages = session.pages
+    for visit in range(rounds * len(pages)):
+        page = pages[(index + visit) % len(pages)]
+        seconds, ok, error = await session.rerun(page)
+        records.append({'session': index, 'page': page[2], 'seconds': seconds,
+                        'ok': ok, 'error': error})
+        if think:
+            await asyncio.sleep(think)
+    # The caller closes the session once every viewer is done, so memory is
+    # read with all of them connected.
+    return session
+
+
+async def _warm_up(url):
+    # Loads the data, fills the shared caches and imports everything once, so the
+    # measured sessions only pay for what is really per session.
+    session = ViewerSession(url)
+    await session.open()
+    await session.rerun()
+    for page in session.pages:
+        await session.rerun(page)
+    await session.close()
+
+
+def load_test(n_sessions, rounds=1, think=0.0, port=DEFAULT_PORT, csv_path=None):
+    """Runs n_sessions concurrent viewers against a fresh server; returns the measurements."""
+    from profiling import percentiles
+
+    server = start_server(port, csv_path)
+    url = f'ws://127.0.0.1:{port}/_stcore/stream'
+    try:
+        asyncio.run(_warm_up(url))
+        time.sleep(1.0)  # let the warm-up's garbage be freed before reading RSS
+        rss_baseline = _status_kib(server.pid, 'VmRSS')
+
+        records = []
+
+        async def run_all():
+            start = time.perf_counter()
+            sessions = await asyncio.gather(*[
+                _viewer(url, i, rounds, think, records) for i in range(n_sessions)])
+            wall = time.perf_counter() - start
+            rss_connected = _status_kib(server.pid, 'VmRSS')
+            await asyncio.gather(*[session.close() for session in sessions])
+            return wall, rss_connected
+
+        wall, rss_connected = asyncio.run(run_all())
+        rss_peak = _status_kib(server.pid, 'VmHWM')
+    finally:
+        server.terminate()
+        server.wait()
+
+    latencies = [r['seconds'] for r in records]
+    by_page = {}
+    for r in records:
+        by_page.setdefault(r['page'], []).append(r['seconds'])
+    overall = percentiles(latencies)
+    return {
+        'sessions': n_sessions,
+        'rounds': rounds,
+        'reruns': len(records),
+        'errors': [r for r in records if not r['ok']],
+        'wall_seconds': round(wall, 3),
+        'reruns_per_second': round(len(records) / wall, 2),
+        'latency': {f'p{p}': round(overall[p], 4) for p in overall},
+        'pages': {page: {f'p{p}': round(v, 4) for p, v in percentiles(values).items()}
+                  for page, values in by_page.items()},
+        'rss_baseline_kib': rss_baseline,
+        'rss_connected_kib': rss_connected,
+        'rss_peak_kib': rss_peak,
+        'rss_per_session_kib': round((rss_connected - rss_baseline) / n_sessions, 1),
+    }
+
+
+# --- Shared-Object Check ---
+# Runs the sessions in this process (AppTest, one per viewer, all kept alive) and
+# after each new session lists the large pandas objects still alive. The shared
+# frame, the filtered frames and the cached aggregates are process-wide, so the
+# list must not grow with the number of sessions; a page that keeps its own copy
+# of a frame (e.g. in st.session_state) shows up as one more object per session.
+# numpy arrays are not tracked by the garbage collector, so tracemalloc's traced
+# memory per session is reported as well.
+def large_objects(min_bytes):
+    """Live DataFrames/Series of at least min_bytes: {id: (description, bytes)}."""
+    import pandas as pd
+
+    gc.collect()
+    found = {}
+    for obj in gc.get_objects():
+        if isinstance(obj, (pd.DataFrame, pd.Series)):
+            size = int(obj.memory_usage(index=True).sum()) if isinstance(obj, pd.DataFrame) \
+                else int(obj.memory_usage(index=True))
+            if size >= min_bytes:
+                found[id(obj)] = (f"{type(obj).__name__} {obj.shape}", size)
+    return found
+
+
+def shared_check(n_sessions, min_mib=LARGE_OBJECT_MIB):
+    """Returns per-session large-object counts and whether they stayed flat."""
+    import tracemalloc
+
+    sys.path.insert(0, APP_DIR)
+    from streamlit.testing.v1 import AppTest
+
+    tracemalloc.start()
+    sessions, rows, first = [], [], None
+    for i in range(n_sessions):
+        app = AppTest.from_file(os.path.join(APP_DIR, ENTRYPOINT), default_timeout=RERUN_TIMEOUT)
+        app.run()
+        for page in PAGES[1:]:  # the entrypoint run already showed the home page
+            app.switch_page(page).run()
+        if app.exception:
+            raise RuntimeError(f"session {i + 1} failed: {app.exception[0].value}")
+        sessions.append(app)
+        objects = large_objects(min_mib * 2 ** 20)
+        if first is None:
+            first = objects
+        rows.append({
+            'sessions': i + 1,
+            'large_objects': len(objects),
+            'large_mib': round(sum(size for _, size in objects.values()) / 2 ** 20, 2),
+            'traced_mib': round(tracemalloc.get_traced_memory()[0] / 2 ** 20, 2),
+        })
+    tracemalloc.stop()
+
+    added = [description for key, (description, _) in objects.items() if key not in first]
+    per_session = ((rows[-1]['traced_mib'] - rows[0]['traced_mib']) / (n_sessions - 1)
+                   if n_sessions > 1 else None)
+    return {
+        'sessions': rows,
+        'shared': rows[-1]['large_objects'] <= rows[0]['large_objects'],
+        'added_objects': added,
+        'traced_mib_per_session': None if per_session is None else round(per_session, 3),
+    }
+
+
+def _shared_check_in_subprocess(n_sessions, min_mib, csv_path):
+    # A fresh interpreter, so the data path is set before data.py is imported and
+    # nothing this process has loaded counts as a live object.
+    env = dict(os.environ)
+    if csv_path is not None:
+        env['SCV_DATA_PATH'] = csv_path
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--worker',
+         '--sessions', str(n_sessions), '--min-mib', str(min_mib)],
+        capture_output=True, text=True, cwd=APP_DIR, env=env,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1:])
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent-session load test of the dashboard.")
+    parser.add_argument('--sessions', type=int, default=10)
+    parser.add_argument('--rounds', type=int, default=3, help="visits of every page per session")
+    parser.add_argument('--think', type=float, default=0.0, help="seconds between a viewer's reruns")
+    parser.add_argument('--rows', type=int, help="synthetic table size (default: bundled df.csv)")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--shared', action='store_true',
+                        help="check in-process that large objects are shared, not copied per session")
+    parser.add_argument('--min-mib', type=float, default=LARGE_OBJECT_MIB,
+                        help="size of the objects the shared check looks at")
+    parser.add_argument('--output', help="write the results as JSON")
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(shared_check(args.sessions, args.min_mib)))
+        return
+
+    csv_path = synthetic_csv(args.rows) if args.rows else None
+    report = {'created': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+              'rows': args.rows}
+    failed = False
+    if args.shared:
+        result = _shared_check_in_subprocess(args.sessions, args.min_mib, csv_path)
+        report['shared_check'] = result
+        for row in result['sessions']:
+            print(f"{row['sessions']:>4} sessions: {row['large_objects']} large objects "
+                  f"({row['large_mib']:.1f} MiB), traced {row['traced_mib']:.1f} MiB")
+        if result['shared']:
+            print(f"shared: large objects do not grow with sessions "
+                  f"({result['traced_mib_per_session']} MiB traced per extra session)")
+        else:
+            failed = True
+            print("COPIED per session: " + ', '.join(result['added_objects']))
+    else:
+        result = load_test(args.sessions, args.rounds, args.think, args.port, csv_path)
+        report['load_test'] = result
+        latency = result['latency']
+        print(f"{result['sessions']} sessions, {result['reruns']} reruns in "
+              f"{result['wall_seconds']:.1f}s: {result['reruns_per_second']:.1f} reruns/s, "
+              f"p50 {latency['p50']:.3f}s, p95 {latency['p95']:.3f}s, p99 {latency['p99']:.3f}s")
+        for page, page_latency in result['pages'].items():
+            print(f"  {page[:50]:<50} p50 {page_latency['p50']:.3f}s  p95 {page_latency['p95']:.3f}s  "
+                  f"p99 {page_latency['p99']:.3f}s")
+        print(f"server RSS: {result['rss_baseline_kib'] / 1024:.0f} MiB after warm-up, "
+              f"{result['rss_connected_kib'] / 1024:.0f} MiB with all sessions "
+              f"({result['rss_per_session_kib'] / 1024:.2f} MiB per session), "
+              f"peak {result['rss_peak_kib'] / 1024:.0f} MiB")
+        if result['errors']:
+            failed = True
+            print(f"{len(result['errors'])} reruns failed, first: {result['errors'][0]}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
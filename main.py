@@ -1,51 +1,55 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-import numpy as np
+
+from bootstrap import show_intervals
+from charts import chart_section
+from data import load_data
+from filters import apply_filters
+from profiling import profile_section
+from summary import fmt, get_summary
 
 # --- 1. Streamlit App Configuration & Data Loading ---
 st.set_page_config(layout="wide")
 st.title("💊 Drug Addiction Risk Factor Analysis Dashboard")
 
-url = 'https://raw.githubusercontent.com/ainagif/SCV/refs/heads/main/df.csv'
-
-# Use Streamlit's caching decorator for better performance
-@st.cache_data
-def load_data(data_url):
-    """Loads the dataframe from the URL."""
-    try:
-        arts_df = pd.read_csv(data_url)
-        return arts_df
-    except Exception as e:
-        st.error(f"Error loading data: {e}")
-        return pd.DataFrame()
+# The shared loader reads the bundled df.csv once per process for all pages
+with profile_section('data'):
+    df = load_data()
 
-df = load_data(url)
+    if df.empty:
+        st.info("The dashboard cannot display visualizations because the data failed to load.")
+        st.stop()
 
-if df.empty:
-    st.info("The dashboard cannot display visualizations because the data failed to load.")
-    st.stop()
+    # Apply the sidebar filters (chosen in sidebar.py) to every chart on the page
+    df = apply_filters(df)
+    if df.empty:
+        st.info("No respondents match the selected filters.")
+        st.stop()
 
 # --- 2. Calculate Actual Metrics for Summary Box ---
-# These calculations use the actual loaded 'df' to populate the metric boxes.
-try:
-    median_age = df['age_midpoint'].median().round(0).astype(int)
-    most_common_marital = df['marital_status'].value_counts().idxmax()
+# These come from the shared summary engine, computed once per data/filter state.
+with profile_section('metrics'):
+    try:
+        summary = get_summary(df)
+        median_age = int(round(summary['median_age']))
+        most_common_marital = fmt(summary['most_common_marital'])
     
-    # Calculate % with Poor/Fair Mental Health (Assuming 'Poor' and 'Fair' are labels)
-    poor_mental_health_count = df['mental_health_status'].isin(['Poor', 'Fair']).sum()
-    mental_health_percentage = (poor_mental_health_count / len(df) * 100).round(1)
+        # Calculate % with Poor/Fair Mental Health (Assuming 'Poor' and 'Fair' are labels)
+        mental_health_percentage = round(summary['poor_fair_mh_pct'], 1)
     
-    # Identify the key education level (e.g., the one with the highest count)
-    key_correlation = df['education_level'].value_counts().idxmax()
+        # Identify the key education level (e.g., the one with the highest count)
+        key_correlation = fmt(summary['most_common_education'])
+        unmarried_percentage = fmt(summary['unmarried_pct'], '%')
+        poor_mh_count = summary['poor_mh_top_education_count']
     
-except KeyError as e:
-    st.warning(f"Could not calculate metric: Missing column {e}. Using placeholders.")
-    median_age = 29
-    most_common_marital = "Single"
-    mental_health_percentage = 65.0
-    key_correlation = "Missing Data"
+    except KeyError as e:
+        st.warning(f"Could not calculate metric: Missing column {e}. Using placeholders.")
+        median_age = 29
+        most_common_marital = "Single"
+        mental_health_percentage = 65.0
+        key_correlation = "Missing Data"
+        unmarried_percentage = "n/a"
+        poor_mh_count = "n/a"
+        summary = None
 
 st.header("""Analyzing Demographics and Key Triggers of Drug Use""")
 
@@ -53,99 +57,72 @@ st.header("""Analyzing Demographics and Key Triggers of Drug Use""")
 # --- 3. Key Findings Summary Box ---
 st.subheader("Key Findings Analyzing Demographics and Key Triggers of Drug Use")
 
-col1, col2, col3, col4 = st.columns(4)
+with profile_section('metrics display'):
+    col1, col2, col3, col4 = st.columns(4)
     
-col1.metric(
-    label="Median Age of Addict", 
-    value=f"{median_age} years", 
-    help="Derived from the 'age_midpoint' distribution."
-)
-col2.metric(
-    label="Most Common Marital Status", 
-    value=f"{most_common_marital}", 
-    help="Most frequent marital status among respondents."
-)
-col3.metric(
-    label="% with Poor/Fair Mental Health", 
-    value=f"{mental_health_percentage}%", 
-    help="Prevalence of respondents reporting 'Poor' or 'Fair' mental health status."
-)
-col4.metric(
-    label="Most Common Education Level", 
-    value=f"{key_correlation}", 
-    help="Most frequent education level reported in the dataset."
-)
+    col1.metric(
+        label="Median Age of Addict", 
+        value=f"{median_age} years", 
+        help="Derived from the 'age_midpoint' distribution."
+    )
+    col2.metric(
+        label="Most Common Marital Status", 
+        value=f"{most_common_marital}", 
+        help="Most frequent marital status among respondents."
+    )
+    col3.metric(
+        label="% with Poor/Fair Mental Health", 
+        value=f"{mental_health_percentage}%", 
+        help="Prevalence of respondents reporting 'Poor' or 'Fair' mental health status."
+    )
+    col4.metric(
+        label="Most Common Education Level", 
+        value=f"{key_correlation}", 
+        help="Most frequent education level reported in the dataset."
+    )
+
+# Filled with the bootstrap intervals at the end of the page (when switched on in
+# the sidebar), so resampling never delays the metrics and charts above
+interval_slot = st.empty()
 
 st.markdown("---")
 
-st.success("""Looking at the summary box displayed, it is based on visualization and summary from streamlit. It has stated several different profiles for the drug addict population studied, among which the analysis shows addiction among those affecting young adults with a Median Age of Addict after reaching the age of 22 years. Looking at the majority of the values ​​obtained, 67.9% are from the unmarried group. Therefore for the Most Common Marital Status. Looking at the risk factors, the value of 16.9% is achieved in the Poor/Moderate Mental Health category. And looking at the education aspect, the Most Common Education Level was Bachelor/Below Degree. In addition, according to the heat map shown, the largest group experiencing mental 'Poor' is 79 individuals. It thus marks a high-risk demographic that requires targeted intervention.
+with profile_section('narrative: key findings'):
+    st.success(f"""Looking at the summary box displayed, it is based on visualization and summary from streamlit. It has stated several different profiles for the drug addict population studied, among which the analysis shows addiction among those affecting young adults with a Median Age of Addict after reaching the age of {median_age} years. Looking at the majority of the values ​​obtained, {unmarried_percentage} are from the unmarried group. Therefore for the Most Common Marital Status. Looking at the risk factors, the value of {mental_health_percentage}% is achieved in the Poor/Moderate Mental Health category. And looking at the education aspect, the Most Common Education Level was {key_correlation}. In addition, according to the heat map shown, the largest group experiencing mental 'Poor' is {poor_mh_count} individuals. It thus marks a high-risk demographic that requires targeted intervention.
 . This metric collectively identifies young unmarried individuals with lower educational attainment and existing mental health problems as a priority focus group""")
 
 # --- 4. Section 1: Demographics and Triggers ---
-st.success("""The lowest incidence of cases is at the age extremes, such as the midpoint of 12 years and 52 years and older. While this suggests that addiction can occur at any age, it reinforces that young adults remain the epicenter of the crisis in the data set.""")
+with profile_section('narrative: age extremes'):
+    st.success("""The lowest incidence of cases is at the age extremes, such as the midpoint of 12 years and 52 years and older. While this suggests that addiction can occur at any age, it reinforces that young adults remain the epicenter of the crisis in the data set.""")
 
 # --- Distribution of Age Midpoints (Histogram) ---
 st.subheader("Distribution of Age Midpoints")
-try:
-    fig_hist = px.histogram(
-        df, 
-        x='age_midpoint', 
-        nbins=10, 
-        title='Distribution of Age Midpoints',
-        color_discrete_sequence=px.colors.qualitative.T10,
-        marginal='box'
-    )
-    fig_hist.update_layout(xaxis_title='Age Midpoint', yaxis_title='Frequency')
-    st.plotly_chart(fig_hist, use_container_width=True)
-except KeyError:
-    st.warning("Column 'age_midpoint' not found.")
+chart_section('age_histogram', df, "Column 'age_midpoint' not found.")
 
-st.success("""SThe data clearly shows that the unmarried group is the center of the drug addiction crisis in the data set, contributing to the highest value of 67.9% of the total cases.""")
+with profile_section('narrative: unmarried share'):
+    st.success(f"""SThe data clearly shows that the unmarried group is the center of the drug addiction crisis in the data set, contributing to the highest value of {unmarried_percentage} of the total cases.""")
 
 # --- Marital Status of Addicts (Pie Chart) ---
 st.subheader("Marital Status of Addicts")
-try:
-    marital_counts = df['marital_status'].value_counts().reset_index()
-    marital_counts.columns = ['Marital Status', 'Count']
-    
-    fig_pie = px.pie(
-        marital_counts, 
-        values='Count', 
-        names='Marital Status', 
-        title='Marital Status of Addicts',
-        hole=.3
-    )
-    st.plotly_chart(fig_pie, use_container_width=True)
-except KeyError:
-    st.warning("Column 'marital_status' not found.")
+chart_section('marital_pie', df, "Column 'marital_status' not found.")
 
-st.success("""Relationship between gender vs. addicted_with. To identify patterns of gender differences in the types of substances most commonly abused.""")
+with profile_section('narrative: gender vs substance'):
+    st.success("""Relationship between gender vs. addicted_with. To identify patterns of gender differences in the types of substances most commonly abused.""")
 
 # --- Education Level vs. Mental Health Status (Heatmap) ---
 st.subheader("Education Level vs. Mental Health Status (Heatmap)")
-try:
-    crosstab_data = pd.crosstab(df['education_level'], df['mental_health_status'])
-
-    fig_heatmap1 = go.Figure(data=go.Heatmap(
-        z=crosstab_data.values,
-        x=crosstab_data.columns,
-        y=crosstab_data.index,
-        colorscale='Viridis'
-    ))
-    
-    fig_heatmap1.update_layout(
-        title='Education Level vs. Mental Health Status',
-        xaxis_title='Mental Health Status',
-        yaxis_title='Education Level'
-    )
-    st.plotly_chart(fig_heatmap1, use_container_width=True)
-except KeyError:
-    st.warning("Columns 'education_level' or 'mental_health_status' not found.")
+chart_section('education_mh_heatmap', df, "Columns 'education_level' or 'mental_health_status' not found.")
 
-st.success("""These findings emphasize that the main cause of substance abuse is psychological distress such as widespread depression, and this problem is not limited to individuals with low educational attainment.""")
+with profile_section('narrative: psychological distress'):
+    st.success("""These findings emphasize that the main cause of substance abuse is psychological distress such as widespread depression, and this problem is not limited to individuals with low educational attainment.""")
 
 
 st.markdown("---")
 
 
 # ... (Code above this line, including data loading into 'df', is omitted for brevity)
+
+# --- Bootstrap Intervals for the Key Findings (drawn last, see interval_slot) ---
+with profile_section('bootstrap intervals'):
+    show_intervals(interval_slot, df, summary, ['median_age', 'poor_fair_mh_pct', 'unmarried_pct',
+                                                 'poor_mh_top_education_count'])
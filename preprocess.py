@@ -0,0 +1,147 @@
+import argparse
+import os
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+from schema import CATEGORY_ORDER, DERIVED_COLUMNS, NUMERIC_DTYPES
+
+# --- Derived Columns from Raw Survey Answers ---
+# The survey tool exports text answers only; the numeric columns of df.csv are
+# derived from them as declared in schema.DERIVED_COLUMNS. Each distinct answer is
+# parsed once and the result is broadcast to the rows through the answer codes,
+# so the cost per row is one array lookup however many rows the export has.
+# Changing how an answer is parsed changes the derived values: bump
+# schema.DERIVATION_RULES_VERSION so cached tables are rebuilt.
+BAND_PATTERN = r'^\s*(\d+(?:\.\d+)?)\s*(?:to|-|–)\s*(\d+(?:\.\d+)?)(?:\s*years?)?\s*$'
+YES_NO = {'no': 0, 'never': 0, 'yes': 1}
+# Bytes of CSV text parsed per batch by the command-line conversion.
+BLOCK_SIZE = 16 << 20
+
+
+def band_midpoints(answers):
+    """Midpoint of each age band answer ("20 to 24 years" -> 22.0), NaN if not a band."""
+    bounds = answers.astype(str).str.extract(BAND_PATTERN, flags=re.IGNORECASE).astype(float)
+    return ((bounds[0] + bounds[1]) / 2).to_numpy()
+
+
+def yes_no_flags(answers):
+    """1 for yes, 0 for no ("No.", " no", "Never" ...), NaN for anything else."""
+    normalized = answers.astype(str).str.strip().str.lower().str.rstrip('.')
+    return normalized.map(YES_NO).to_numpy(dtype=float)
+
+
+MAPPERS = {
+    'band_midpoint': band_midpoints,
+    'yes_no': yes_no_flags,
+}
+
+
+def _answers_and_codes(values):
+    # Distinct answers and each row's position among them (-1 for a missing answer).
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.categories, values.cat.codes.to_numpy()
+    codes, answers = pd.factorize(values)
+    return pd.Index(answers), codes
+
+
+def derive_columns(raw_df, overwrite=False):
+    """Adds the numeric columns that can be derived from the frame's text answers.
+
+    Columns already present are kept unless overwrite is set. Source columns that
+    are not part of the dashboard schema (age_of_first_use) are dropped once used.
+    Answers that cannot be mapped are collected over all columns and reported in
+    one ValueError, with the number of rows giving each of them.
+    """
+    derived, used_sources, unmapped = {}, [], {}
+    for col, (source, kind) in DERIVED_COLUMNS.items():
+        if source not in raw_df.columns or (col in raw_df.columns and not overwrite):
+            continue
+        answers, codes = _answers_and_codes(raw_df[source])
+        mapped = MAPPERS[kind](answers)
+        bad = np.isnan(mapped)
+        if bad.any():
+            rows = np.bincount(codes[codes >= 0], minlength=len(answers))
+            unmapped[source] = {str(answer): int(n) for answer, n in zip(answers[bad], rows[bad])}
+            continue
+        # The extra NaN at the end is picked up by code -1 (missing answer).
+        values = np.append(mapped, np.nan)[codes]
+        if (codes >= 0).all() and col in NUMERIC_DTYPES:
+            values = values.astype(NUMERIC_DTYPES[col])
+        derived[col] = values
+        used_sources.append(source)
+    if unmapped:
+        raise ValueError(f"Unmapped answers (rows per answer): {unmapped}")
+    if not derived:
+        return raw_df
+
+    df = raw_df.copy(deep=False)
+    for col, values in derived.items():
+        df[col] = values
+    schema_columns = set(CATEGORY_ORDER) | set(NUMERIC_DTYPES)
+    return df.drop(columns=[col for col in used_sources if col not in schema_columns])
+
+
+def preprocess_csv(raw_path, out_path, block_size=BLOCK_SIZE):
+    """Converts a raw survey export to the df.csv layout, batch by batch; returns rows.
+
+    Uses pyarrow's streaming CSV reader and writer. Text answers are dictionary
+    encoded while parsing, so they reach derive_columns as categoricals and the
+    derivation is a code lookup.
+    """
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+
+    tmp_path = f"{out_path}.{os.getpid()}.tmp"
+    reader = pa_csv.open_csv(
+        raw_path,
+        read_options=pa_csv.ReadOptions(block_size=block_size),
+        convert_options=pa_csv.ConvertOptions(auto_dict_encode=True,
+                                              auto_dict_max_cardinality=1000),
+    )
+    writer, rows = None, 0
+    try:
+        for batch in reader:
+            table = pa.Table.from_pandas(derive_columns(batch.to_pandas()), preserve_index=False)
+            if writer is None:
+                # Later batches are cast to the first one's types (e.g. a flag column
+                # that is int8 in one batch and float with missing answers in another).
+                schema = table.schema
+                writer = pa_csv.CSVWriter(tmp_path, schema)
+            writer.write_table(table.cast(schema))
+            rows += batch.num_rows
+        if writer is not None:
+            writer.close()
+            writer = None
+            os.replace(tmp_path, out_path)
+    finally:
+        if writer is not None:
+            writer.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Derive the numeric columns of a raw survey export (df.csv layout).")
+    parser.add_argument('raw_csv')
+    parser.add_argument('out_csv')
+    parser.add_argument('--block-size', type=int, default=BLOCK_SIZE,
+                        help="bytes of CSV parsed per batch")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        rows = preprocess_csv(args.raw_csv, args.out_csv, args.block_size)
+    except ValueError as e:
+        raise SystemExit(f"{args.raw_csv}: {e}")
+    seconds = time.perf_counter() - start
+    print(f"{args.raw_csv}: {rows} rows -> {args.out_csv} in {seconds:.1f}s "
+          f"({rows / max(seconds, 1e-9):,.0f} rows/s)")
+
+
+if __name__ == '__main__':
+    main()
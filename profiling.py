@@ -0,0 +1,207 @@
+import json
+import logging
+import threading
+import time
+import tracemalloc
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+import streamlit as st
+
+# Structured per-section timings go to this logger as one JSON object per line,
+# so latency percentiles can be aggregated across sessions and hosts.
+logger = logging.getLogger('scv.profile')
+
+# Process-wide history of the last timings of every section, for the panel's
+# percentiles. Shared by all sessions.
+HISTORY_SIZE = 500
+PANEL_KEY = 'profile_panel'
+_RUN_KEY = '_profile_run'
+
+_history = defaultdict(lambda: deque(maxlen=HISTORY_SIZE))
+_cache_counts = defaultdict(lambda: {'hit': 0, 'miss': 0})
+_lock = threading.Lock()
+_local = threading.local()
+# Sessions whose panel is on; tracemalloc runs while this is not empty.
+_tracing_sessions = set()
+_tracing_started = False
+
+
+def _session_id():
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return ctx.session_id if ctx is not None else None
+
+
+def _run_state():
+    """This session's records for the current script run (None outside a session)."""
+    if _session_id() is None:
+        return None
+    try:
+        return st.session_state.get(_RUN_KEY)
+    except Exception:
+        return None
+
+
+def panel_enabled():
+    """True when the debug panel is switched on (sidebar toggle or ?profile=1)."""
+    try:
+        return bool(st.session_state.get(PANEL_KEY)) or st.query_params.get('profile') == '1'
+    except Exception:
+        return False
+
+
+def _update_tracing(session_id, enabled):
+    # Allocation tracking slows down every allocation in the process, so it only
+    # runs while at least one session has the panel on. Sessions that were closed
+    # with the panel on are dropped here too. Tracing someone else started (e.g.
+    # loadtest.py --shared) is left alone.
+    global _tracing_started
+    from streamlit import runtime
+
+    with _lock:
+        if enabled:
+            _tracing_sessions.add(session_id)
+        else:
+            _tracing_sessions.discard(session_id)
+        if runtime.exists():
+            active = runtime.get_instance().is_active_session
+            _tracing_sessions.difference_update(
+                [sid for sid in _tracing_sessions if not active(sid)])
+        if _tracing_sessions and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracing_started = True
+        elif not _tracing_sessions and _tracing_started:
+            tracemalloc.stop()
+            _tracing_started = False
+
+
+def begin_run(page):
+    """Starts a new profile for this session's script run; called from sidebar.py."""
+    st.session_state[_RUN_KEY] = {'page': page, 'sections': [], 'caches': []}
+    _update_tracing(_session_id(), panel_enabled())
+
+
+@contextmanager
+def profile_section(name):
+    """Times a block of page code and, with the panel on, its peak allocations.
+
+    Sections can be nested; a nested section is recorded as 'outer/inner'.
+    """
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    # Each frame is [name, highest traced peak seen by its nested sections].
+    frame = [name, 0]
+    stack.append(frame)
+    path = '/'.join(entry[0] for entry in stack)
+    tracking = tracemalloc.is_tracing()
+    if tracking:
+        # Peak tracking is process-wide: concurrent sessions can inflate it.
+        tracemalloc.reset_peak()
+        alloc_start = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        stack.pop()
+        alloc_kib = None
+        if tracking and tracemalloc.is_tracing():
+            # A nested section resets the peak, so take the highest one it saw too.
+            peak = max(tracemalloc.get_traced_memory()[1], frame[1])
+            alloc_kib = (peak - alloc_start) / 1024
+            if stack:
+                stack[-1][1] = max(stack[-1][1], peak)
+        _record(path, len(stack), elapsed_ms, alloc_kib)
+
+
+def _record(path, depth, elapsed_ms, alloc_kib):
+    run = _run_state()
+    page = run['page'] if run else None
+    with _lock:
+        _history[path].append(elapsed_ms)
+    if run is not None:
+        run['sections'].append({'section': path, 'depth': depth, 'ms': elapsed_ms,
+                                'alloc_kib': alloc_kib})
+    logger.info(json.dumps({
+        'event': 'section',
+        'page': page,
+        'section': path,
+        'session': _session_id(),
+        'ms': round(elapsed_ms, 3),
+        'alloc_kib': None if alloc_kib is None else round(alloc_kib, 1),
+        'ts': time.time(),
+    }))
+
+
+def record_cache(cache, hit):
+    """Counts a hit or miss of one of the dashboard's caches."""
+    outcome = 'hit' if hit else 'miss'
+    with _lock:
+        _cache_counts[cache][outcome] += 1
+    run = _run_state()
+    if run is not None:
+        run['caches'].append({'cache': cache, 'outcome': outcome})
+    logger.info(json.dumps({'event': 'cache', 'cache': cache, 'outcome': outcome,
+                            'session': _session_id(), 'ts': time.time()}))
+
+
+# --- Cache Probes for st.cache_* Functions ---
+# Streamlit does not report whether a cached call hit; the cached function body
+# calls mark_miss(), which is only reached when the value is (re)computed.
+def mark_miss():
+    _local.missed = True
+
+
+@contextmanager
+def cache_probe(cache):
+    """Records a hit or miss for the st.cache_* call made inside the block."""
+    _local.missed = False
+    try:
+        yield
+    finally:
+        record_cache(cache, hit=not _local.missed)
+
+
+def percentiles(values, points=(50, 95, 99)):
+    ordered = sorted(values)
+    if not ordered:
+        return {p: None for p in points}
+    return {p: ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+            for p in points}
+
+
+# --- Debug Panel ---
+def panel_toggle():
+    """Draws the opt-in switch for the debug panel in the sidebar."""
+    st.sidebar.toggle("Show performance panel", key=PANEL_KEY)
+
+
+def render_panel():
+    """Shows this run's section timings and the process-wide percentiles."""
+    if not panel_enabled():
+        return
+    import pandas as pd
+
+    run = _run_state() or {'sections': [], 'caches': []}
+    with st.sidebar.expander("Performance", expanded=True):
+        top_level_ms = sum(s['ms'] for s in run['sections'] if s['depth'] == 0)
+        st.caption(f"This run: {top_level_ms:.0f} ms in top-level sections")
+        if run['sections']:
+            st.dataframe(pd.DataFrame(run['sections']).round(1), hide_index=True)
+        with _lock:
+            history = {name: list(values) for name, values in _history.items()}
+            caches = {name: dict(counts) for name, counts in _cache_counts.items()}
+        rows = []
+        for name, values in sorted(history.items()):
+            p = percentiles(values)
+            rows.append({'section': name, 'n': len(values),
+                         'p50 ms': p[50], 'p95 ms': p[95], 'p99 ms': p[99]})
+        if rows:
+            st.caption("All sessions (last %d runs per section)" % HISTORY_SIZE)
+            st.dataframe(pd.DataFrame(rows).round(1), hide_index=True)
+        if caches:
+            st.caption("Cache hits / misses")
+            st.dataframe(pd.DataFrame(caches).T, hide_index=False)
@@ -0,0 +1,186 @@
+import argparse
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from data import LOCAL_PATH, REMOTE_URL, load_columnar
+from schema import CATEGORY_ORDER
+
+logger = logging.getLogger(__name__)
+
+# --- Remote Survey Source ---
+# The last good copy of the remote CSV is kept on disk (with its columnar cache)
+# and served to every rerun. Once it is older than the TTL, a background thread
+# revalidates it with the server (If-None-Match / If-Modified-Since), so a rerun
+# never waits on the network; only the very first load, with nothing on disk yet,
+# has to download. A new copy is parsed and checked before it replaces the old
+# one, and the frame's data_version is the content hash, so every downstream
+# cache (cube, summary, figures) switches over on the next rerun.
+REMOTE_DIR = os.environ.get('SCV_REMOTE_DIR') or os.path.splitext(LOCAL_PATH)[0] + '.remote'
+REMOTE_TTL = float(os.environ.get('SCV_REMOTE_TTL') or 300)
+FETCH_TIMEOUT = 30
+COPY_FILE = 'survey.csv'
+ARROW_FILE = 'survey.arrow'
+META_FILE = 'remote.json'
+
+
+class RemoteSource:
+    """The on-disk copy of one remote CSV, revalidated at most once per TTL."""
+
+    def __init__(self, url=REMOTE_URL, directory=REMOTE_DIR, ttl=REMOTE_TTL):
+        self.url = url
+        self.directory = directory
+        self.ttl = ttl
+        self.copy_path = os.path.join(directory, COPY_FILE)
+        self.arrow_path = os.path.join(directory, ARROW_FILE)
+        self.meta_path = os.path.join(directory, META_FILE)
+        self._lock = threading.Lock()        # guards _meta and _refreshing
+        self._fetch_lock = threading.Lock()  # one download at a time
+        self._refreshing = False
+        self._meta = self._read_meta()
+
+    def _read_meta(self):
+        try:
+            with open(self.meta_path) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        # A copy of another URL (or a missing copy) is not reused.
+        if meta.get('url') != self.url or not os.path.exists(self.copy_path):
+            return {}
+        return meta
+
+    def _save_meta(self, meta):
+        tmp_path = f"{self.meta_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp_path, self.meta_path)
+        with self._lock:
+            self._meta = meta
+
+    @property
+    def version(self):
+        """Content hash of the current copy (the frame's data_version), or None."""
+        with self._lock:
+            return self._meta.get('sha256')
+
+    def fetch(self):
+        """Revalidates the copy with the server; returns True if the content changed.
+
+        Raises on network errors and on a download that does not parse as the
+        survey table; the previous copy stays in place either way.
+        """
+        with self._fetch_lock:
+            with self._lock:
+                meta = dict(self._meta)
+            request = urllib.request.Request(self.url)
+            if meta.get('etag'):
+                request.add_header('If-None-Match', meta['etag'])
+            if meta.get('last_modified'):
+                request.add_header('If-Modified-Since', meta['last_modified'])
+
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = f"{self.copy_path}.{os.getpid()}.tmp"
+            try:
+                with urllib.request.urlopen(request, timeout=FETCH_TIMEOUT) as response:
+                    with open(tmp_path, 'wb') as f:
+                        shutil.copyfileobj(response, f, 1 << 20)
+                    headers = response.headers
+            except urllib.error.HTTPError as e:
+                if e.code != 304 or not meta:
+                    raise
+                logger.info("%s not modified", self.url)
+                self._save_meta({**meta, 'checked_at': time.time()})
+                return False
+
+            tmp_arrow_path = f"{self.arrow_path}.{os.getpid()}.tmp"
+            try:
+                # Parsing the download also writes its columnar cache; the rename
+                # keeps size and mtime, so the cache stays valid for the copy.
+                df = load_columnar(tmp_path, tmp_arrow_path)
+                missing = [col for col in CATEGORY_ORDER if col not in df.columns]
+                if missing or df.empty:
+                    raise ValueError(f"{self.url} is not the survey table "
+                                     f"({len(df)} rows, missing columns {missing})")
+                version = df.attrs['data_version']
+                os.replace(tmp_arrow_path, self.arrow_path)
+                os.replace(tmp_path, self.copy_path)
+            finally:
+                for path in (tmp_path, tmp_arrow_path):
+                    if os.path.exists(path):
+                        os.remove(path)
+            changed = version != meta.get('sha256')
+            self._save_meta({
+                'url': self.url,
+                'etag': headers.get('ETag'),
+                'last_modified': headers.get('Last-Modified'),
+                'sha256': version,
+                'rows': len(df),
+                'checked_at': time.time(),
+                'fetched_at': time.time() if changed else meta.get('fetched_at'),
+            })
+            logger.info("%s %s (%d rows, version %s)", self.url,
+                        'updated' if changed else 'unchanged', len(df), version[:12])
+            return changed
+
+    def ensure_copy(self):
+        """Returns the version of the copy, downloading it first if there is none."""
+        if self.version is None:
+            self.fetch()
+        return self.version
+
+    def refresh_if_stale(self):
+        """Starts a background revalidation once the TTL has passed; never blocks."""
+        with self._lock:
+            stale = time.time() - self._meta.get('checked_at', 0) >= self.ttl
+            if self._refreshing or not stale:
+                return False
+            self._refreshing = True
+        threading.Thread(target=self._refresh, name='scv-remote-refresh', daemon=True).start()
+        return True
+
+    def _refresh(self):
+        try:
+            self.fetch()
+        except Exception as e:
+            logger.warning("Refreshing %s failed, keeping the last good copy: %s", self.url, e)
+            # Retry after another TTL rather than on every rerun.
+            with self._lock:
+                self._meta = {**self._meta, 'checked_at': time.time()}
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+
+_source = None
+_source_lock = threading.Lock()
+
+
+def remote_source():
+    """Returns the process-wide RemoteSource shared by all sessions."""
+    global _source
+    with _source_lock:
+        if _source is None:
+            _source = RemoteSource()
+        return _source
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fetch or revalidate the remote survey copy.")
+    parser.add_argument('--url', default=REMOTE_URL)
+    parser.add_argument('--dir', default=REMOTE_DIR)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    source = RemoteSource(args.url, args.dir)
+    changed = source.fetch()
+    print(f"{args.url}: {'updated' if changed else 'unchanged'}, version {source.version}")
+
+
+if __name__ == '__main__':
+    main()
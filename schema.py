@@ -0,0 +1,60 @@
+import hashlib
+import json
+
+# This module stays free of heavy imports (no pandas/pyarrow) so the sidebar
+# filters can read the answer lists without delaying the home page.
+
+# --- Survey Schema ---
+# Every survey answer is stored as an ordered categorical (int8 codes plus one
+# shared dictionary) instead of one Python string per row. The order is the
+# natural reading order of the answers, so sorting, crosstabs and charts come out
+# in that order without extra sort_values calls.
+CATEGORY_ORDER = {
+    'age': ['10 to 14 years', '15 to 19 years', '20 to 24 years', '25 to 29 years',
+            '30 to 34 years', '35 to 39 years'],
+    'gender': ['male', 'female'],
+    'addicted_with': ['None.', 'Single drug', 'Multiple drug'],
+    'reason_to_become_addicted': ['none', 'depression', 'tension', 'stress relief',
+                                  'love problems', 'family problems', 'friends influence',
+                                  'social trend'],
+    'religion': ['Muslim', 'Hinduism', 'Buddhism', 'Christianity'],
+    'education_level': ['jsc/a level', 'ssc/a level', 'hsc/a level',
+                        'undergraduate/under degree', 'graduate/degree',
+                        'postgraduate (msc/phd)'],
+    'marital_status': ['Unmarried', 'Married', 'Divorce'],
+    'living_with_drug_user': ['No.', 'Yes'],
+    'failure_in_life': ['No.', 'Yes'],
+    'mental/emotional_problem': ['Never', 'Anger', 'Tension/Anxiety',
+                                 'Depression/ inferiority/Guilt'],
+    'smoking': ['Never', 'Yes Sometime', 'Yes regular'],
+    'friends_influence': ["Never, they don't", 'Yes, often they do'],
+    'family_history_of_drug_use': ['Never', 'Yes'],
+    'mental_health_status': ['Poor', 'Average', 'Good'],
+}
+
+NUMERIC_DTYPES = {
+    'age_midpoint': 'float32',
+    'age_of_first_use_midpoint': 'float32',
+    'failure_in_life_numeric': 'int8',
+}
+
+# How the numeric columns are derived from the text answers of a raw survey
+# export (see preprocess.py): the midpoint of an age band ("20 to 24 years" ->
+# 22.0) or a yes/no flag ("No." -> 0, "Yes" -> 1). age_of_first_use is only in
+# the raw export; df.csv keeps just its midpoint.
+DERIVED_COLUMNS = {
+    'age_midpoint': ('age', 'band_midpoint'),
+    'age_of_first_use_midpoint': ('age_of_first_use', 'band_midpoint'),
+    'failure_in_life_numeric': ('failure_in_life', 'yes_no'),
+}
+
+# Version of the parsing rules in preprocess.py (BAND_PATTERN, YES_NO, the
+# mappers); bump it whenever a raw answer would be derived differently.
+DERIVATION_RULES_VERSION = 1
+
+# Bumped automatically whenever the schema above changes, so old columnar caches
+# written with a different coding (or different derived values) are never reused.
+SCHEMA_VERSION = hashlib.sha256(
+    json.dumps([CATEGORY_ORDER, NUMERIC_DTYPES, DERIVED_COLUMNS, DERIVATION_RULES_VERSION],
+               sort_keys=True).encode()
+).hexdigest()[:12]
@@ -1,5 +1,10 @@
 import streamlit as st
 
+from bootstrap import interval_toggle
+from filters import filter_controls
+from profiling import begin_run, panel_toggle, render_panel
+from startup import warm_up
+
 st.set_page_config(
     page_title="main"
 )
@@ -31,4 +36,20 @@ pg = st.navigation(
     }
 )
 
-pg.run()
+# Filters live in the entrypoint so the selection persists across pages
+filter_controls()
+
+# Start importing pandas/plotly in the background (once per process) so the data
+# pages are ready by the time someone leaves the home page
+warm_up()
+
+# Bootstrap interval mode for the key-findings metrics of every data page
+interval_toggle()
+
+# Opt-in performance panel (also ?profile=1); timings are logged either way
+panel_toggle()
+begin_run(pg.title)
+try:
+    pg.run()
+finally:
+    render_panel()
@@ -0,0 +1,183 @@
+import argparse
+import importlib
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# --- Background Warm-Up ---
+# Libraries the data pages need before their first chart can render, in the
+# order they are first used. sidebar.py starts importing them while the home
+# page is on screen, so opening a data page later does not pay for them.
+WARMUP_MODULES = [
+    'numpy',
+    'pandas',
+    'pyarrow',
+    'scipy.stats',
+    'plotly.graph_objects',
+    'plotly.express',
+    'plotly.io',
+    'plotly.subplots',
+    'data',
+    'aggregates',
+    'summary',
+    'associations',
+    'charts',
+]
+
+# Seconds spent importing each module in the warm-up thread (after it finishes).
+warmup_timings = {}
+_warmup_lock = threading.Lock()
+_warmup_started = False
+
+
+def _import_all(modules):
+    started = time.perf_counter()
+    for name in modules:
+        start = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            logger.warning("Warm-up could not import %s: %s", name, e)
+            continue
+        warmup_timings[name] = time.perf_counter() - start
+    logger.info("Warm-up imports finished in %.2fs: %s", time.perf_counter() - started,
+                {name: round(seconds, 3) for name, seconds in warmup_timings.items()})
+
+
+def warm_up(modules=WARMUP_MODULES):
+    """Imports the heavy data/chart libraries in a background thread, once per process."""
+    global _warmup_started
+    with _warmup_lock:
+        if _warmup_started:
+            return
+        _warmup_started = True
+    threading.Thread(target=_import_all, args=(list(modules),),
+                     name='scv-warmup', daemon=True).start()
+
+
+# --- Startup-Time Report ---
+# The modules each page script imports, in the order Streamlit runs them:
+# sidebar.py (the entrypoint) always runs before the page itself. Modules that an
+# earlier one already imports (profiling via filters) are left out, as their
+# cost is part of that module's.
+PAGE_IMPORTS = {
+    'home.py': ['streamlit', 'bootstrap', 'filters', 'startup'],
+    'main.py': ['streamlit', 'bootstrap', 'filters', 'startup', 'charts', 'data', 'summary'],
+    'Studying_Social_and_Mental_Health_Risk_Factors_Among_Addicts.py':
+        ['streamlit', 'bootstrap', 'filters', 'startup', 'charts', 'data', 'summary'],
+    'Identifying Correlations between Risk and Life Outcome.py':
+        ['streamlit', 'bootstrap', 'filters', 'startup', 'associations', 'charts', 'data',
+         'summary'],
+}
+# Imported lazily by the chart builders the first time a chart renders
+# (plotly.graph_objects and plotly.io are already loaded by streamlit).
+CHART_IMPORTS = ['plotly.express', 'plotly.subplots']
+
+# Run in the fresh interpreter: imports the modules one by one and prints how
+# long each took, or null for one that an earlier import had already loaded.
+_TIMED_IMPORTS = """
+import importlib, json, sys, time
+costs = {}
+for name in sys.argv[1:]:
+    if name in sys.modules:
+        costs[name] = None
+        continue
+    start = time.perf_counter()
+    importlib.import_module(name)
+    costs[name] = time.perf_counter() - start
+print(json.dumps(costs))
+"""
+
+
+def measure_imports(modules, top_packages=8):
+    """Imports modules in a fresh interpreter and returns where the time went.
+
+    'modules' charges each requested module for what importing it adds on top of
+    the modules listed before it; one that was already loaded by then is listed
+    in 'preloaded' instead. 'packages' sums the self time of every imported
+    module by top-level package (pandas, pyarrow, ...), from ``-X importtime``.
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _TIMED_IMPORTS, *modules],
+        cwd=APP_DIR, capture_output=True, text=True, check=True,
+    )
+    timed = json.loads(result.stdout.strip().splitlines()[-1])
+    packages = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        self_time, cumulative, name = line[len('import time:'):].split('|', 2)
+        if not cumulative.strip().isdigit():
+            continue  # the header line
+        package = name.strip().split('.')[0]
+        packages[package] = packages.get(package, 0.0) + int(self_time) / 1e6
+    heaviest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top_packages]
+    return {
+        'modules': {name: round(seconds, 4) for name, seconds in timed.items()
+                    if seconds is not None},
+        'preloaded': [name for name, seconds in timed.items() if seconds is None],
+        'packages': {name: round(seconds, 4) for name, seconds in heaviest},
+    }
+
+
+def startup_report():
+    """Returns the import cost breakdown of every page, then of the first chart render."""
+    report = {}
+    for page, modules in PAGE_IMPORTS.items():
+        page_costs = measure_imports(modules)
+        chart_costs = measure_imports(modules + CHART_IMPORTS)['modules']
+        report[page] = {
+            'imports': page_costs['modules'],
+            'preloaded': page_costs['preloaded'],
+            'packages': page_costs['packages'],
+            'first_chart': {name: chart_costs[name] for name in CHART_IMPORTS
+                            if name in chart_costs},
+            'total': round(sum(page_costs['modules'].values()), 4),
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report the import cost of each dashboard page.")
+    parser.add_argument('--json', help="also write the report to this JSON file")
+    parser.add_argument('--baseline', help="compare against a report written earlier with --json")
+    parser.add_argument('--threshold', type=float, default=0.05,
+                        help="flag modules that got slower by more than this many seconds")
+    args = parser.parse_args()
+
+    report = startup_report()
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    for page, costs in report.items():
+        print(f"{page}  (page imports: {costs['total']:.3f}s)")
+        for section in ('imports', 'packages', 'first_chart'):
+            for name, seconds in costs[section].items():
+                line = f"  {section:<12}{name:<24}{seconds:8.3f}s"
+                if baseline and page in baseline:
+                    before = baseline[page][section].get(name)
+                    if before is not None:
+                        line += f"  ({seconds - before:+.3f}s)"
+                        if seconds - before > args.threshold:
+                            line += "  REGRESSION"
+                print(line)
+        for name in costs['preloaded']:
+            print(f"  {'preloaded':<12}{name:<24}(already imported by an earlier module)")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
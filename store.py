@@ -0,0 +1,233 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from aggregates import CountCube, register_cube
+from data import LOCAL_PATH, STORE_MANIFEST, STORE_PATH, apply_schema, file_digest
+from preprocess import derive_columns
+from schema import CATEGORY_ORDER, NUMERIC_DTYPES, SCHEMA_VERSION
+
+logger = logging.getLogger(__name__)
+
+# --- Survey Wave Store ---
+# A directory of Arrow IPC part files, one per ingested CSV (survey wave), plus a
+# manifest listing them. A wave is read in bounded chunks of rows, coded with the
+# df.csv schema, written batch by batch into its part file and reduced into a
+# count cube. The store's cube is the merge of the cubes of all waves, so
+# appending a wave never rescans the rows of the earlier ones.
+# The manifest is replaced last and atomically: readers only ever see complete
+# waves, and the dashboard picks a new wave up on its next rerun.
+CHUNK_ROWS = 100_000
+LOCK_FILE = '.lock'
+
+STORE_COLUMNS = list(CATEGORY_ORDER) + list(NUMERIC_DTYPES)
+ARROW_SCHEMA = pa.schema(
+    [pa.field(col, pa.dictionary(pa.int8(), pa.string(), ordered=True)) for col in CATEGORY_ORDER]
+    + [pa.field(col, pa.from_numpy_dtype(np.dtype(dtype))) for col, dtype in NUMERIC_DTYPES.items()]
+)
+
+
+def read_manifest(store_path=STORE_PATH):
+    """Returns the store manifest (an empty one if the store does not exist yet)."""
+    try:
+        with open(os.path.join(store_path, STORE_MANIFEST)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'schema': SCHEMA_VERSION, 'version': None, 'rows': 0, 'parts': [], 'cube': None}
+
+
+def _write_json_atomic(path, payload):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(payload, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+@contextmanager
+def _store_lock(store_path):
+    # One writer at a time; readers never need the lock.
+    lock_path = os.path.join(store_path, LOCK_FILE)
+    try:
+        fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        raise RuntimeError(f"{lock_path} exists: another ingestion is running "
+                           "(remove the file if it is left over from a crash)") from None
+    try:
+        yield
+    finally:
+        os.close(fd)
+        os.remove(lock_path)
+
+
+# --- Cube Files ---
+def save_cube(cube, path):
+    """Writes a CountCube as .npz (cells and counts, plus dims/levels as JSON)."""
+    meta = {'dims': cube.dims,
+            'levels': {col: cube.levels[col].tolist() for col in cube.dims}}
+    tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+    np.savez(tmp_path, cells=cube.cells, counts=cube.counts, meta=np.array(json.dumps(meta)))
+    os.replace(tmp_path, path)
+
+
+def load_cube(path):
+    with np.load(path, allow_pickle=False) as arrays:
+        meta = json.loads(str(arrays['meta']))
+        levels = {col: pd.Index(values) for col, values in meta['levels'].items()}
+        return CountCube(meta['dims'], levels, arrays['cells'], arrays['counts'])
+
+
+# --- Ingestion ---
+def validate_chunk(chunk):
+    """Codes one chunk of raw rows with the store schema, rejecting anything else."""
+    chunk = derive_columns(chunk)
+    missing = [col for col in STORE_COLUMNS if col not in chunk.columns]
+    extra = [col for col in chunk.columns if col not in STORE_COLUMNS]
+    if missing or extra:
+        raise ValueError(f"Columns do not match the survey schema: missing {missing}, "
+                         f"unexpected {extra}")
+    return apply_schema(chunk[STORE_COLUMNS], strict=True)
+
+
+def _store_version(parts):
+    digests = [part['sha256'] for part in parts]
+    return hashlib.sha256(json.dumps([SCHEMA_VERSION, digests]).encode()).hexdigest()
+
+
+def append_csv(csv_path, store_path=STORE_PATH, chunk_rows=CHUNK_ROWS, baseline=LOCAL_PATH):
+    """Appends one survey wave (CSV) to the store; returns its manifest entry.
+
+    Returns None if the same file content was ingested before. A wave with
+    undeclared answers or unexpected columns is rejected as a whole (ValueError)
+    and leaves the store unchanged. Once the store exists the dashboard reads
+    only the store, so an empty store is first seeded with the baseline table
+    (df.csv) as its first wave; pass baseline=None to start without it. The
+    seeded baseline stays even if the wave itself is then rejected.
+    """
+    os.makedirs(store_path, exist_ok=True)
+    with _store_lock(store_path):
+        if baseline is not None and not read_manifest(store_path)['parts']:
+            if not os.path.exists(baseline):
+                raise ValueError(f"baseline {baseline} not found; the store would replace it "
+                                 "with this wave alone (use --no-baseline to allow that)")
+            logger.info("Seeding %s with the baseline %s", store_path, baseline)
+            _append(baseline, store_path, chunk_rows)
+        return _append(csv_path, store_path, chunk_rows)
+
+
+def _append(csv_path, store_path, chunk_rows):
+    # Called with the store lock held.
+    manifest = read_manifest(store_path)
+    if manifest['schema'] != SCHEMA_VERSION:
+        raise ValueError(f"{store_path} was written with schema {manifest['schema']}; "
+                         f"rebuild it for schema {SCHEMA_VERSION}")
+    digest = file_digest(csv_path)
+    if any(part['sha256'] == digest for part in manifest['parts']):
+        logger.info("%s is already in the store, skipping", csv_path)
+        return None
+
+    part_file = f"part-{len(manifest['parts']):05d}.arrow"
+    part_path = os.path.join(store_path, part_file)
+    tmp_path = f"{part_path}.{os.getpid()}.tmp"
+    part_cube, rows = None, 0
+    try:
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, ARROW_SCHEMA) as writer:
+                for chunk in pd.read_csv(csv_path, chunksize=chunk_rows):
+                    typed = validate_chunk(chunk)
+                    writer.write_table(pa.Table.from_pandas(
+                        typed, schema=ARROW_SCHEMA, preserve_index=False))
+                    chunk_cube = CountCube.from_frame(typed)
+                    part_cube = (chunk_cube if part_cube is None
+                                 else CountCube.merge([part_cube, chunk_cube]))
+                    rows += len(typed)
+    except (ValueError, pa.ArrowInvalid) as e:
+        os.remove(tmp_path)
+        raise ValueError(f"{csv_path} rejected (chunk starting at row {rows}): {e}") from e
+    if part_cube is None:
+        os.remove(tmp_path)
+        raise ValueError(f"{csv_path} has no rows")
+    os.replace(tmp_path, part_path)
+
+    entry = {'file': part_file, 'source': os.path.basename(csv_path),
+             'sha256': digest, 'rows': rows}
+    parts = manifest['parts'] + [entry]
+    version = _store_version(parts)
+    old_cube = manifest['cube']
+    cube = part_cube
+    if old_cube is not None:
+        cube = CountCube.merge([load_cube(os.path.join(store_path, old_cube)), part_cube])
+    cube_file = f"cube-{version[:16]}.npz"
+    save_cube(cube, os.path.join(store_path, cube_file))
+
+    _write_json_atomic(os.path.join(store_path, STORE_MANIFEST), {
+        'schema': SCHEMA_VERSION,
+        'version': version,
+        'rows': manifest['rows'] + rows,
+        'parts': parts,
+        'cube': cube_file,
+    })
+    if old_cube is not None:
+        os.remove(os.path.join(store_path, old_cube))
+    logger.info("Appended %d rows from %s as %s", rows, csv_path, part_file)
+    return entry
+
+
+# --- Reading ---
+def load_store(store_path=STORE_PATH):
+    """Reads every wave of the store into one typed frame (memory-mapped parts).
+
+    The merged cube stored with the manifest is registered for the frame's data
+    version, so the charts and metrics do not rebuild it from the rows.
+    """
+    manifest = read_manifest(store_path)
+    if not manifest['parts']:
+        raise FileNotFoundError(f"{store_path} has no survey waves")
+    tables = []
+    for part in manifest['parts']:
+        with pa.memory_map(os.path.join(store_path, part['file'])) as source:
+            tables.append(pa.ipc.open_file(source).read_all())
+    df = pa.concat_tables(tables).to_pandas(split_blocks=True)
+    df.attrs['data_version'] = manifest['version']
+    if manifest['cube'] is not None:
+        register_cube(manifest['version'], load_cube(os.path.join(store_path, manifest['cube'])))
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Append survey waves (CSV files) to the store. The dashboard reads only the "
+                    "store once it exists, so a new store starts with the baseline table as its "
+                    "first wave.")
+    parser.add_argument('csv', nargs='+', help="CSV files with the df.csv columns")
+    parser.add_argument('--store', default=STORE_PATH)
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    parser.add_argument('--baseline', default=LOCAL_PATH,
+                        help="table a new store is seeded with (default: %(default)s)")
+    parser.add_argument('--no-baseline', action='store_const', const=None, dest='baseline',
+                        help="start a new store with the given waves only")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    for csv_path in args.csv:
+        try:
+            entry = append_csv(csv_path, args.store, args.chunk_rows, args.baseline)
+        except ValueError as e:
+            print(f"{csv_path}: {e}")
+            continue
+        if entry is None:
+            print(f"{csv_path}: already ingested")
+        else:
+            print(f"{csv_path}: {entry['rows']} rows -> {entry['file']}")
+    manifest = read_manifest(args.store)
+    print(f"{args.store}: {len(manifest['parts'])} waves, {manifest['rows']} rows")
+
+
+if __name__ == '__main__':
+    main()
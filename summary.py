@@ -0,0 +1,81 @@
+import streamlit as st
+
+from aggregates import get_cube
+from profiling import cache_probe, mark_miss
+
+# --- Key Findings Metrics ---
+# Every number shown in the "Key Findings" boxes is derived here from the count
+# cube, which is itself built in one pass over the rows. Results are memoized per
+# data version, and a filtered frame has its own version, so each filter state
+# is computed once and shared by all pages and sessions.
+
+
+def _top(counts):
+    """Returns (label, count) of the largest non-empty entry, or (None, 0)."""
+    counts = counts[counts > 0]
+    if counts.empty:
+        return None, 0
+    label = counts.idxmax()
+    return label, int(counts[label])
+
+
+def _row_top(table, row):
+    if row not in table.index:
+        return None, 0
+    return _top(table.loc[row])
+
+
+def _column_top(table, column):
+    if column not in table.columns:
+        return None, 0
+    return _top(table[column])
+
+
+def compute_summary(cube):
+    """Computes all key-findings metrics from a CountCube."""
+    education_mh = cube.crosstab('education_level', 'mental_health_status')
+    marital_problem = cube.crosstab('marital_status', 'mental/emotional_problem')
+    addiction_history = cube.crosstab('addicted_with', 'family_history_of_drug_use')
+    stacked = education_mh.stack()
+
+    summary = {'respondents': cube.total}
+    summary['median_age'] = cube.median('age_midpoint')
+    summary['peak_age_band'], summary['peak_age_count'] = _top(cube.value_counts('age'))
+    summary['most_common_marital'], _ = _top(cube.value_counts('marital_status'))
+    summary['most_common_education'], _ = _top(cube.value_counts('education_level'))
+    summary['poor_fair_mh_pct'] = cube.share('mental_health_status', ['Poor', 'Fair'])
+    summary['unmarried_pct'] = cube.share('marital_status', ['Unmarried'])
+    summary['unmarried_top_problem'], summary['unmarried_top_problem_count'] = _row_top(
+        marital_problem, 'Unmarried')
+    summary['poor_mh_top_education'], summary['poor_mh_top_education_count'] = _column_top(
+        education_mh, 'Poor')
+    summary['single_drug_family_history'], summary['single_drug_family_history_count'] = _row_top(
+        addiction_history, 'Single drug')
+    (summary['largest_education_mh_cell'],
+     summary['largest_education_mh_count']) = _top(stacked) if not stacked.empty else (None, 0)
+    return summary
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _summary_for_version(version, _cube):
+    mark_miss()
+    return compute_summary(_cube)
+
+
+def get_summary(df):
+    """Returns the key-findings metrics for a (possibly filtered) frame."""
+    version = df.attrs.get('data_version')
+    if version is None:
+        return compute_summary(get_cube(df))
+    cube = get_cube(df)
+    with cache_probe('summary'):
+        return _summary_for_version(version, cube)
+
+
+def fmt(value, suffix=''):
+    """Formats a metric for display, showing 'n/a' when the filters leave no data."""
+    if value is None:
+        return 'n/a'
+    if isinstance(value, float):
+        return f"{value:.1f}{suffix}"
+    return f"{value}{suffix}"
@@ -0,0 +1,47 @@
+import pandas as pd
+
+from aggregates import CountCube
+from associations import ASSOCIATION_COLUMNS, compute_associations, strongest_associations
+from data import load_columnar
+
+
+def _pairs(rows):
+    return pd.DataFrame(rows, columns=ASSOCIATION_COLUMNS)
+
+
+def test_strongest_counts_a_column_and_its_coding_once():
+    pairs = _pairs([
+        ('age', 'failure_in_life', 'cramers_v', 0.4, 0.4, 10.0, 0.001, 100),
+        ('age_midpoint', 'failure_in_life', 'correlation_ratio', 0.5, 0.5, 12.0, 0.001, 100),
+        ('age', 'age_midpoint', 'correlation_ratio', 1.0, 1.0, 99.0, 0.0, 100),
+        ('gender', 'smoking', 'cramers_v', 0.3, 0.3, 5.0, 0.01, 100),
+    ])
+
+    strongest = strongest_associations(pairs)
+
+    assert list(zip(strongest['x'], strongest['y'])) == [
+        ('age_midpoint', 'failure_in_life'), ('gender', 'smoking')]
+
+
+def test_strongest_empty_when_no_pair_is_significant():
+    pairs = _pairs([
+        ('age', 'failure_in_life', 'cramers_v', 0.4, 0.4, 1.0, 0.5, 2),
+        ('gender', 'smoking', 'cramers_v', 0.3, 0.3, 1.0, 0.9, 2),
+    ])
+
+    strongest = strongest_associations(pairs)
+
+    assert strongest.empty
+    assert list(strongest.columns) == ASSOCIATION_COLUMNS
+
+
+def test_strongest_empty_for_a_tiny_filtered_selection():
+    # The two respondents aged 10 to 14 with a postgraduate degree: nothing is
+    # significant, and the page must take its "no association" branch.
+    df = load_columnar()
+    subset = df[(df['age'] == '10 to 14 years')
+                & (df['education_level'] == 'postgraduate (msc/phd)')]
+
+    strongest = strongest_associations(compute_associations(CountCube.from_frame(subset)), top=3)
+
+    assert strongest.empty
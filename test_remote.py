@@ -0,0 +1,174 @@
+import hashlib
+import os
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from remote import RemoteSource
+
+BUNDLED_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'df.csv')
+
+
+class SurveyServer:
+    """Local stand-in for the remote CSV: serves a body with ETag/Last-Modified."""
+
+    def __init__(self, body):
+        self.body = body
+        self.modified = formatdate(usegmt=True)
+        self.delay = 0.0
+        self.responses = []  # status code of every request served
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                time.sleep(server.delay)
+                etag = '"%s"' % hashlib.sha256(server.body).hexdigest()[:16]
+                if self.headers.get('If-None-Match') == etag:
+                    server.responses.append(304)
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                server.responses.append(200)
+                self.send_response(200)
+                self.send_header('ETag', etag)
+                self.send_header('Last-Modified', server.modified)
+                self.send_header('Content-Length', str(len(server.body)))
+                self.end_headers()
+                self.wfile.write(server.body)
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self._httpd.server_port}/df.csv'
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+
+    def set_body(self, body):
+        self.body = body
+        self.modified = formatdate(time.time() + 1, usegmt=True)
+
+    def close(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+@pytest.fixture
+def survey_csv():
+    with open(BUNDLED_CSV, 'rb') as f:
+        return f.read()
+
+
+@pytest.fixture
+def server(survey_csv):
+    server = SurveyServer(survey_csv)
+    yield server
+    server.close()
+
+
+def _wait_for_refresh(source, timeout=30):
+    deadline = time.monotonic() + timeout
+    while source._refreshing and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not source._refreshing
+
+
+def test_first_download(server, tmp_path):
+    source = RemoteSource(server.url, str(tmp_path), ttl=60)
+    assert source.version is None
+
+    version = source.ensure_copy()
+
+    assert version is not None
+    assert server.responses == [200]
+    assert os.path.exists(source.copy_path)
+    assert os.path.exists(source.arrow_path)
+
+
+def test_no_request_within_ttl(server, tmp_path):
+    source = RemoteSource(server.url, str(tmp_path), ttl=60)
+    source.ensure_copy()
+
+    assert source.ensure_copy() is not None
+    assert source.refresh_if_stale() is False
+    # A restart picks up the copy and its last check from disk.
+    restarted = RemoteSource(server.url, str(tmp_path), ttl=60)
+    assert restarted.ensure_copy() == source.version
+    assert restarted.refresh_if_stale() is False
+    assert server.responses == [200]
+
+
+def test_revalidation_not_modified(server, tmp_path):
+    source = RemoteSource(server.url, str(tmp_path), ttl=60)
+    version = source.ensure_copy()
+    mtime = os.stat(source.copy_path).st_mtime_ns
+
+    assert source.fetch() is False
+
+    assert server.responses == [200, 304]
+    assert source.version == version
+    assert os.stat(source.copy_path).st_mtime_ns == mtime
+
+
+def test_changed_content_new_version(server, survey_csv, tmp_path):
+    source = RemoteSource(server.url, str(tmp_path), ttl=60)
+    old_version = source.ensure_copy()
+    lines = survey_csv.splitlines(keepends=True)
+    server.set_body(b''.join(lines[:len(lines) // 2]))
+
+    assert source.fetch() is True
+
+    assert server.responses == [200, 200]
+    assert source.version not in (None, old_version)
+    with open(source.copy_path, 'rb') as f:
+        assert f.read() == server.body
+
+
+def test_corrupt_download_keeps_old_copy(server, survey_csv, tmp_path):
+    source = RemoteSource(server.url, str(tmp_path), ttl=60)
+    version = source.ensure_copy()
+    arrow_mtime = os.stat(source.arrow_path).st_mtime_ns
+    server.set_body(b'<html>rate limited</html>\n')
+
+    with pytest.raises(ValueError):
+        source.fetch()
+
+    assert source.version == version
+    with open(source.copy_path, 'rb') as f:
+        assert f.read() == survey_csv
+    assert os.stat(source.arrow_path).st_mtime_ns == arrow_mtime
+    assert [name for name in os.listdir(tmp_path) if name.endswith('.tmp')] == []
+
+
+def test_refresh_if_stale_never_blocks(server, survey_csv, tmp_path):
+    source = RemoteSource(server.url, str(tmp_path), ttl=0)
+    version = source.ensure_copy()
+    server.delay = 2.0
+    lines = survey_csv.splitlines(keepends=True)
+    server.set_body(b''.join(lines[:len(lines) // 2]))
+
+    start = time.perf_counter()
+    assert source.refresh_if_stale() is True
+    assert time.perf_counter() - start < 0.5
+    # A second stale rerun does not start another download.
+    assert source.refresh_if_stale() is False
+    assert source.version == version
+
+    _wait_for_refresh(source)
+    assert source.version != version
+    assert server.responses == [200, 200]
+
+
+def test_failed_refresh_keeps_copy(server, tmp_path):
+    source = RemoteSource(server.url, str(tmp_path), ttl=0)
+    version = source.ensure_copy()
+    server.close()
+
+    assert source.refresh_if_stale() is True
+    _wait_for_refresh(source)
+
+    assert source.version == version
+    assert os.path.exists(source.copy_path)